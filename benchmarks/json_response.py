@@ -0,0 +1,105 @@
+# Serialization cost of a 1,000-question GET /questions payload.
+# "before" is the old path: per-field str()/isoformat() in the router, the
+# recursive bytes walk in SafeJSONResponse, then json.dumps. "after" hands
+# the raw documents to utils.json_response.dumps, i.e. an endpoint that
+# returns FastJSONResponse itself. "default path" is an endpoint returning a
+# plain dict with FastJSONResponse only as default_response_class: FastAPI
+# runs jsonable_encoder before render, and that rejects ObjectId, so the
+# router still has to str() the ids first.
+#
+#   python benchmarks/json_response.py
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import json_response  # noqa: E402
+
+QUESTIONS = 1000
+ROUNDS = 50
+
+
+def make_questions():
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"How do I paginate question {i}?",
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "tags": ["python", "fastapi", "mongodb"],
+            "author_id": ObjectId(),
+            "created_at": now - timedelta(minutes=i),
+            "last_activity_at": now - timedelta(seconds=i),
+            "attachment_url": None,
+            "answer_count": i % 7,
+            "score": i % 13,
+        }
+        for i in range(QUESTIONS)
+    ]
+
+
+def before(questions):
+    data = []
+    for q in questions:
+        q = dict(q)  # the router mutated in place; copy so rounds stay comparable
+        q["_id"] = str(q["_id"])
+        q["author_id"] = str(q["author_id"])
+        q["created_at"] = q["created_at"].isoformat()
+        if q.get("last_activity_at"):
+            q["last_activity_at"] = q["last_activity_at"].isoformat()
+        data.append(q)
+
+    def convert_bytes(obj):
+        if isinstance(obj, bytes):
+            return obj.decode("utf-8")
+        if isinstance(obj, dict):
+            return {k: convert_bytes(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [convert_bytes(i) for i in obj]
+        return obj
+
+    content = {"success": True, "count": len(data), "data": data, "next_cursor": None}
+    return json.dumps(convert_bytes(content)).encode("utf-8")
+
+
+def after(questions, dumps=json_response.dumps):
+    return dumps({"success": True, "count": len(questions), "data": questions, "next_cursor": None})
+
+
+def default_path(questions):
+    data = []
+    for q in questions:
+        q = dict(q)
+        q["_id"] = str(q["_id"])
+        q["author_id"] = str(q["author_id"])
+        data.append(q)
+    content = {"success": True, "count": len(data), "data": data, "next_cursor": None}
+    return json_response.dumps(jsonable_encoder(content))
+
+
+def stdlib_dumps(content):
+    return json.dumps(
+        content, default=json_response._default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def report(name, fn, questions):
+    best = min(timeit.repeat(lambda: fn(questions), number=ROUNDS, repeat=5)) / ROUNDS
+    print(f"{name:<28} {best * 1000:8.3f} ms/payload  {len(fn(questions)):>8} bytes")
+    return best
+
+
+if __name__ == "__main__":
+    questions = make_questions()
+    assert json.loads(before(questions)) == json.loads(after(questions))
+    assert json.loads(default_path(questions)) == json.loads(after(questions))
+    backend = "orjson" if json_response.orjson else "stdlib"
+    base = report("before (SafeJSONResponse)", before, questions)
+    fast = report(f"after ({backend})", after, questions)
+    report("after (stdlib fallback)", lambda q: after(q, stdlib_dumps), questions)
+    report("default path (encoder)", default_path, questions)
+    print(f"speedup: {base / fast:.1f}x")
@@ -0,0 +1,135 @@
+# Requests/sec through the middleware stack (rate limit + timing + metrics)
+# around a trivial JSON endpoint, called in-process over ASGI:
+#
+# - before: the three layers as BaseHTTPMiddleware subclasses.
+# - after: the plain ASGI middleware in middleware/.
+#
+# Also checks that a streamed response's first chunk gets through the
+# stack before the stream ends.
+#
+#   python benchmarks/middleware_stack.py
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["RATE_LIMIT_READS"] = "1000000000/60"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from middleware.metrics import MetricsMiddleware  # noqa: E402
+from middleware.rate_limit import RateLimitMiddleware, client_key, limiters, route_group  # noqa: E402
+from middleware.timing import TimingMiddleware  # noqa: E402
+from utils.metrics import request_metrics  # noqa: E402
+
+REQUESTS = 2000
+ROUNDS = 5
+
+
+class BaseRateLimit(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        await limiters[route_group(request.scope)].hit(await client_key(request))
+        return await call_next(request)
+
+
+class BaseTiming(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        response.headers["server-timing"] = "app;dur=%.3f" % ((time.perf_counter() - started) * 1000)
+        return response
+
+
+class BaseMetrics(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        request_metrics.observe(
+            request.method, getattr(route, "path", "<unmatched>"), response.status_code,
+            time.perf_counter() - started, int(response.headers.get("content-length", 0)),
+        )
+        return response
+
+
+def make_app(*middleware):
+    app = FastAPI()
+
+    @app.get("/questions/{question_id}")
+    async def question(question_id: str):
+        return {"success": True, "data": {"_id": question_id, "title": "How do I paginate?"}}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"first"
+            await asyncio.sleep(0.2)
+            yield b"second"
+        return StreamingResponse(chunks())
+
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+def scope_for(path):
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("10.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+
+async def call(app, path, on_message=None):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if on_message:
+            on_message(message)
+
+    await app(scope_for(path), receive, send)
+
+
+async def requests_per_second(app):
+    for _ in range(200):  # warm up
+        await call(app, "/questions/abc")
+    best = 0.0
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await call(app, "/questions/abc")
+        best = max(best, REQUESTS / (time.perf_counter() - started))
+    return best
+
+
+async def first_chunk_delay(app):
+    started = time.perf_counter()
+    arrivals = []
+
+    def on_message(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            arrivals.append(time.perf_counter() - started)
+
+    await call(app, "/stream", on_message)
+    return arrivals[0]
+
+
+async def main():
+    stacks = {
+        "no middleware": make_app(),
+        "before (BaseHTTPMiddleware)": make_app(BaseRateLimit, BaseTiming, BaseMetrics),
+        "after (ASGI)": make_app(RateLimitMiddleware, TimingMiddleware, MetricsMiddleware),
+    }
+    for name, app in stacks.items():
+        rps = await requests_per_second(app)
+        first = await first_chunk_delay(app)
+        print(f"{name:<28} {rps:8.0f} req/s   first stream chunk after {first * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
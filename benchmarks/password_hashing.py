@@ -0,0 +1,71 @@
+# Logins per second for a burst of concurrent password checks, run on
+# Starlette's shared threadpool (the old way) and on the bcrypt process
+# pool with 1..N workers. Alongside the burst, a trivial sync endpoint is
+# simulated on the threadpool every 10 ms; its p50/p99 show how much the
+# burst starves sync handlers.
+#
+#   BCRYPT_ROUNDS=10 python benchmarks/password_hashing.py
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+import hashing  # noqa: E402
+
+LOGINS = int(os.getenv("LOGINS", "200"))
+PASSWORD = "correct horse battery staple"
+
+
+def noop():
+    return None
+
+
+async def probe(stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await run_in_threadpool(noop)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def burst(name, verify):
+    stop = asyncio.Event()
+    latencies = []
+    prober = asyncio.create_task(probe(stop, latencies))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    assert all(ok for ok, _ in results)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    print(
+        f"{name:<24} {LOGINS / elapsed:7.1f} logins/s   sync endpoint p50 "
+        f"{statistics.median(latencies) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+async def main():
+    hashed = hashing._hash(PASSWORD)
+    print(f"bcrypt cost {hashing.BCRYPT_ROUNDS}, {os.cpu_count()} CPUs, {LOGINS} concurrent logins")
+
+    await burst("threadpool", lambda: run_in_threadpool(hashing._verify_and_update, PASSWORD, hashed))
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        pool = hashing.HashPool(workers=workers, max_pending=LOGINS)
+        hashing.hash_pool = pool
+        # Start the workers before timing
+        await asyncio.gather(*(pool.run(hashing._hash, "warm") for _ in range(workers)))
+        await burst(f"process pool ({workers})", lambda: pool.run(hashing._verify_and_update, PASSWORD, hashed))
+        pool.shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+# Client-side cost of a 1,000-question page from one BSON reply batch:
+# decoding it and encoding the JSON body.
+#
+# - client: documents are fetched with Projection.mongo and converted in
+#   Python (the default).
+# - pushdown: documents arrive already shaped by Projection.pushdown
+#   (PROJECTION_PUSHDOWN=1). The batch is built here the way the server
+#   would return it.
+#
+# Reports time per page, peak allocation and gen-0 collections per page.
+#
+#   python benchmarks/projection_pushdown.py
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+import bson
+from bson import ObjectId
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.projections import QUESTION  # noqa: E402
+from utils.json_response import dumps  # noqa: E402
+
+QUESTIONS = 1000
+ROUNDS = 50
+
+
+def make_questions():
+    now = datetime.utcnow().replace(microsecond=0)
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"How do I paginate question {i}?",
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "tags": ["python", "fastapi", "mongodb"],
+            "author_id": ObjectId(),
+            "attachment_url": None,
+            "created_at": now - timedelta(minutes=i),
+            "last_activity_at": now - timedelta(seconds=i),
+            "answer_count": i % 7,
+            "score": i % 13,
+        }
+        for i in range(QUESTIONS)
+    ]
+
+
+def pushed_down(doc):
+    return {**doc, "_id": str(doc["_id"]), "author_id": str(doc["author_id"])}
+
+
+def client_path(batch):
+    questions = [QUESTION.convert(doc) for doc in bson.decode_all(batch)]
+    return dumps({"success": True, "count": len(questions), "data": questions, "next_cursor": None})
+
+
+def pushdown_path(batch):
+    questions = bson.decode_all(batch)
+    return dumps({"success": True, "count": len(questions), "data": questions, "next_cursor": None})
+
+
+def report(name, fn, batch):
+    best = min(timeit.repeat(lambda: fn(batch), number=ROUNDS, repeat=5)) / ROUNDS
+    tracemalloc.start()
+    fn(batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    before = gc.get_stats()[0]["collections"]
+    for _ in range(ROUNDS):
+        fn(batch)
+    collections = (gc.get_stats()[0]["collections"] - before) / ROUNDS
+    print(f"{name:<10} {best * 1000:8.3f} ms/page  peak {peak / 1024:8.1f} KiB  {collections:5.1f} gen0 GCs/page")
+
+
+if __name__ == "__main__":
+    questions = make_questions()
+    client_batch = b"".join(bson.encode(doc) for doc in questions)
+    pushdown_batch = b"".join(bson.encode(pushed_down(doc)) for doc in questions)
+    assert client_path(client_batch) == pushdown_path(pushdown_batch)
+    report("client", client_path, client_batch)
+    report("pushdown", pushdown_path, pushdown_batch)
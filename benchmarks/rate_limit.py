@@ -0,0 +1,88 @@
+# Rate limiter cost with 100k distinct client IPs, three requests each
+# ("spread"), and with 1k IPs sending a full window's limit each ("hot").
+#
+# - "list log" is the old per-IP timestamp list, filtered on every request.
+# - The sliding window counter runs on the in-memory KV backend, once
+#   capped at one key per client and at half that.
+#
+# Reports time per request, and for the spread run the keys held and the
+# memory still allocated afterwards.
+#
+#   python benchmarks/rate_limit.py
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middleware.rate_limit import SlidingWindowLimiter  # noqa: E402
+from utils.kv import MemoryKV  # noqa: E402
+
+CLIENTS = 100_000
+HITS = 3
+LIMIT = 30
+WINDOW = 60
+IPS = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(CLIENTS)]
+
+
+class ListLogLimiter:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.requests = {}
+
+    async def hit(self, key):
+        now = time.time()
+        log = self.requests.get(key, [])
+        log = [t for t in log if now - t < self.window]
+        if len(log) >= self.limit:
+            self.requests[key] = log
+            return 1
+        log.append(now)
+        self.requests[key] = log
+        return 0
+
+
+async def hit_all(limiter, ips, hits):
+    for _ in range(hits):
+        for ip in ips:
+            await limiter.hit(ip)
+
+
+async def timed(make_limiter, ips, hits):
+    limiter = make_limiter()
+    started = time.perf_counter()
+    await hit_all(limiter, ips, hits)
+    return (time.perf_counter() - started) / (len(ips) * hits) * 1e6
+
+
+async def run(name, make_limiter, size):
+    spread = await timed(make_limiter, IPS, HITS)
+    hot = await timed(make_limiter, IPS[:1000], LIMIT)
+
+    # Separate pass for memory, tracemalloc slows everything down
+    tracemalloc.start()
+    limiter = make_limiter()
+    await hit_all(limiter, IPS, HITS)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<28} spread {spread:5.2f} us/request  hot {hot:5.2f} us/request  "
+        f"{size(limiter):>7} keys  {held / 2**20:5.1f} MiB held"
+    )
+
+
+async def main():
+    await run("list log", lambda: ListLogLimiter(LIMIT, WINDOW), lambda lim: len(lim.requests))
+    for cap in (CLIENTS, CLIENTS // 2):
+        await run(
+            f"sliding window (cap {cap})",
+            lambda: SlidingWindowLimiter(MemoryKV(max_entries=cap), LIMIT, WINDOW),
+            lambda lim: len(lim.backend._data),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
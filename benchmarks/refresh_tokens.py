@@ -0,0 +1,51 @@
+# CPU cost of renewing an access token: a password login (bcrypt verify at
+# BCRYPT_ROUNDS + signing) against a refresh (hashing the presented and the
+# new secret + signing). Mongo round trips are left out; both flows make
+# one lookup and the login flow also inserts a session.
+#
+#   python benchmarks/refresh_tokens.py
+import os
+import secrets
+import sys
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hashing import BCRYPT_ROUNDS, _hash, _verify_and_update  # noqa: E402
+from repository import session as session_repo  # noqa: E402
+from utils.auth import create_access_token  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+CLAIMS = {"user_id": "65a000000000000000000001", "email": "user@example.com", "sid": "s"}
+
+
+def timed(fn, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - started) / runs * 1e6
+
+
+def login(hashed):
+    _verify_and_update(PASSWORD, hashed)
+    create_access_token(CLAIMS)
+
+
+def refresh(secret):
+    session_repo._hash(secret)
+    session_repo._hash(secrets.token_urlsafe(32))
+    create_access_token(CLAIMS)
+
+
+def main():
+    hashed = _hash(PASSWORD)
+    secret = secrets.token_urlsafe(32)
+    login_us = timed(lambda: login(hashed), 20)
+    refresh_us = timed(lambda: refresh(secret), 20_000)
+    print(f"login   (bcrypt cost {BCRYPT_ROUNDS}) {login_us:10.1f} us CPU")
+    print(f"refresh                   {refresh_us:10.1f} us CPU  ({login_us / refresh_us:,.0f}x cheaper)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,116 @@
-from pymongo import MongoClient
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-from pathlib import Path
+from utils.mongo_pool import pool_stats
+from utils.mongo_monitor import command_monitor
+import importlib.util
 import os
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "InvoX")  # fallback to InvoX
+USERS_COLLECTION = "DB"  # this is the actual collection name
 
 if not MONGO_URI:
     raise ValueError("MONGO_URI environment variable is not set")
 
-# Sync client
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-users_collection = db["DB"]  # this is the actual collection name
-collection = users_collection
-# Async client
-async_client = AsyncIOMotorClient(MONGO_URI)
-async_db = async_client[DB_NAME]
-async_users_collection = async_db["DB"]
+# Pool tuning, set per worker (total connections = workers * MONGO_MAX_POOL_SIZE)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+
+# Opt-in: the largest read endpoints push the projection specs' conversions
+# into the query (see utils/projection.py). Needs MongoDB 4.4+.
+PROJECTION_PUSHDOWN = os.getenv("PROJECTION_PUSHDOWN", "0") == "1"
+
+# Python packages backing each wire compressor (zlib is stdlib)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+# Created by connect() from the app lifespan. The sync handle shares the
+# Motor client's pool so each worker keeps a single set of connections.
+async_client = None
+
+
+def available_compressors():
+    names = [c.strip() for c in MONGO_COMPRESSORS.split(",") if c.strip()]
+    return [
+        name for name in names
+        if name in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[name])
+    ]
+
+
+def client_options():
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "event_listeners": [pool_stats, command_monitor],
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+def connect():
+    global async_client
+    if async_client is None:
+        async_client = AsyncIOMotorClient(MONGO_URI, **client_options())
+    return async_client
+
+
+def close():
+    global async_client
+    if async_client is not None:
+        async_client.close()
+        async_client = None
+
+
+def get_async_client():
+    if async_client is None:
+        raise RuntimeError("MongoDB client is not connected, call database.connect() first")
+    return async_client
+
+
+def get_async_db():
+    return get_async_client()[DB_NAME]
+
+
+def get_async_users_collection():
+    return get_async_db()[USERS_COLLECTION]
+
+
+# Sync view over the same pool, for threadpool (def) handlers and scripts
+def get_client():
+    return get_async_client().delegate
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def get_users_collection():
+    return get_db()[USERS_COLLECTION]
+
+
+# Warm-up: open the first connection before serving traffic
+async def warm_up():
+    try:
+        await get_async_client().admin.command("ping")
+        print(" Connected to MongoDB Atlas (async)")
+        return True
+    except Exception as e:
+        print(f" Async MongoDB connection failed: {e}")
+        return False
+
 
 # Test connection
 def test_connection():
     try:
-        client.admin.command("ping")
+        get_client().admin.command("ping")
         print(" Connected to MongoDB Atlas (sync)")
         return True
     except Exception as e:
@@ -34,10 +119,4 @@ def test_connection():
 
 # Async test
 async def test_async_connection():
-    try:
-        await async_client.admin.command("ping")
-        print(" Connected to MongoDB Atlas (async)")
-        return True
-    except Exception as e:
-        print(f" Async MongoDB connection failed: {e}")
-        return False
\ No newline at end of file
+    return await warm_up()
@@ -1,12 +1,123 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException
 from passlib.context import CryptContext
+from utils.metrics import Histogram, histogram_lines, register_collector
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Hashes made with another cost are rehashed on the
+# next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes for hashing, and how many hash/verify calls may be
+# running or waiting before new ones are turned away with a 503
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 1)))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 16)))
 
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# Run in the worker processes, so module level
+def _hash(password: str):
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# bcrypt on a dedicated process pool, so a login burst neither blocks the
+# event loop nor takes Starlette's threadpool away from sync endpoints.
+# Calls beyond `max_pending` fail fast instead of queueing without bound.
+class HashPool:
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.duration = Histogram()  # queue wait + hashing, seconds
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a process that already runs Motor's threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed); start a fresh pool next time
+            self._executor = None
+            raise
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self.duration.observe(time.perf_counter() - started)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self):
+        return {
+            "workers": self.workers,
+            "running": min(self.pending, self.workers),
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def exposition_lines(self):
+        stats = self.snapshot()
+        return [
+            "# HELP password_hash_queue_depth bcrypt calls waiting for a worker process.",
+            "# TYPE password_hash_queue_depth gauge",
+            f"password_hash_queue_depth {stats['queued']}",
+            "# HELP password_hash_running bcrypt calls running in worker processes.",
+            "# TYPE password_hash_running gauge",
+            f"password_hash_running {stats['running']}",
+            "# HELP password_hash_rejected_total bcrypt calls turned away because the queue was full.",
+            "# TYPE password_hash_rejected_total counter",
+            f"password_hash_rejected_total {stats['rejected']}",
+            "# HELP password_hash_duration_seconds bcrypt call time including the queue wait.",
+            "# TYPE password_hash_duration_seconds histogram",
+            *histogram_lines("password_hash_duration_seconds", f'workers="{self.workers}"', self.duration),
+        ]
+
+
+hash_pool = HashPool()
+register_collector(hash_pool.exposition_lines)
+
+
+# Awaitable only: bcrypt always runs on the hash pool, never inline in a handler
 class Hash:
     @staticmethod
-    def bcrypt(password: str):
-        return pwd_context.hash(password)
+    async def hash(password: str):
+        return await hash_pool.run(_hash, password)
 
+    # (matches, new hash or None); a new hash is returned when the stored
+    # one was made with another cost factor and should replace it
     @staticmethod
-    def verify(hashed_password: str, plain_password: str):
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_and_update(hashed_password: str, plain_password: str):
+        return await hash_pool.run(_verify_and_update, plain_password, hashed_password)
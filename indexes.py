@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+import database
+
+# Opt-in retention: when set, read notifications are deleted this many days
+# after they were created. Unset, notifications are kept.
+NOTIFICATION_TTL_DAYS = os.getenv("NOTIFICATION_TTL_DAYS")
+
+# Every index the app's queries rely on, per collection.
+# Names are fixed so reruns are idempotent and reports stay readable.
+INDEXES = {
+    "questions": [
+        # GET /questions newest first
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("last_activity_at", DESCENDING), ("_id", DESCENDING)], name="last_activity_at_id"),
+        IndexModel([("score", DESCENDING), ("_id", DESCENDING)], name="score_id"),
+        # unanswered=true
+        IndexModel(
+            [("answer_count", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="answer_count_created_at_id",
+        ),
+        IndexModel([("author_id", ASCENDING)], name="author_id"),
+        # /search $text queries
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("tags", TEXT)],
+            name="question_text",
+            weights={"title": 10, "tags": 5, "description": 1},
+        ),
+        # Moderation views only scan flagged documents
+        IndexModel(
+            [("flagged", ASCENDING), ("_id", DESCENDING)],
+            name="flagged_id_partial",
+            partialFilterExpression={"flagged": True},
+        ),
+    ],
+    "answers": [
+        # GET /questions/{id}/answers sort modes
+        IndexModel([("question_id", ASCENDING), ("score", DESCENDING), ("_id", DESCENDING)], name="question_id_score_id"),
+        IndexModel([("question_id", ASCENDING), ("_id", DESCENDING)], name="question_id_id"),
+        IndexModel(
+            [("question_id", ASCENDING), ("is_accepted", DESCENDING), ("score", DESCENDING), ("_id", DESCENDING)],
+            name="question_id_accepted_score_id",
+        ),
+        IndexModel(
+            [("flagged", ASCENDING), ("_id", DESCENDING)],
+            name="flagged_id_partial",
+            partialFilterExpression={"flagged": True},
+        ),
+    ],
+    "votes": [
+        # One vote per user per answer
+        IndexModel([("answer_id", ASCENDING), ("user_id", ASCENDING)], name="answer_user_unique", unique=True),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp"),
+    ],
+    "flags": [
+        # One flag per user per target; admin flags carry no user_id
+        IndexModel(
+            [("target_type", ASCENDING), ("target_id", ASCENDING), ("user_id", ASCENDING)],
+            name="target_user_unique",
+            unique=True,
+            partialFilterExpression={"user_id": {"$type": "string"}},
+        ),
+    ],
+    "sessions": [
+        # Refresh sessions are removed once expires_at passes
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    database.USERS_COLLECTION: [
+        # Login and registration look users up by email
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+}
+
+if NOTIFICATION_TTL_DAYS:
+    INDEXES["notifications"].append(IndexModel(
+        [("timestamp", ASCENDING)],
+        name="read_ttl",
+        expireAfterSeconds=int(NOTIFICATION_TTL_DAYS) * 24 * 3600,
+        partialFilterExpression={"is_read": True},
+    ))
+
+
+# One createIndexes per index: a batch is all-or-nothing, so a single
+# conflict (e.g. a hand-made text index under another name, as a collection
+# can only have one) would otherwise leave the whole collection unindexed.
+# Returns {collection: {"created": [names], "failed": {name: error}}}.
+async def ensure_indexes():
+    db = database.get_async_db()
+    result = {}
+    for collection, models in INDEXES.items():
+        created, failed = [], {}
+        for model in models:
+            name = model.document["name"]
+            try:
+                created += await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                # e.g. duplicate emails block the unique index, or an index
+                # with the same name or keys exists with different options
+                print(f" Index creation failed on {collection}.{name}: {e}")
+                failed[name] = str(e)
+        result[collection] = {"created": created, "failed": failed}
+    return result
+
+
+async def index_report():
+    db = database.get_async_db()
+    report = {}
+    for collection, models in INDEXES.items():
+        declared = {model.document["name"] for model in models}
+        existing = set(await db[collection].index_information())
+        existing.discard("_id_")
+
+        try:
+            stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+            unused = sorted(
+                s["name"] for s in stats
+                if s["name"] != "_id_" and s["accesses"]["ops"] == 0
+            )
+        except OperationFailure:
+            unused = None  # $indexStats needs clusterMonitor privileges
+
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": unused,
+        }
+    return report
+
+
+async def _main(command):
+    database.connect()
+    try:
+        if command == "ensure":
+            failures = 0
+            for collection, result in (await ensure_indexes()).items():
+                print(f"{collection}: {', '.join(result['created']) or '-'}")
+                for name, error in result["failed"].items():
+                    print(f"  failed {name}: {error}")
+                failures += len(result["failed"])
+            return 1 if failures else 0
+        elif command == "report":
+            for collection, result in (await index_report()).items():
+                print(f"{collection}: {result}")
+        else:
+            print("usage: python indexes.py [ensure|report]")
+            return 2
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "ensure")))
@@ -2,39 +2,43 @@ from fastapi import FastAPI, Request
 from routers import question, questions, answers, votes, notifications, flag
 from routers import notifications_ws, user, authentication
 from middleware.rate_limit import RateLimitMiddleware
+from middleware.timing import TimingMiddleware
+from middleware.metrics import MetricsMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from routers import admin
+from routers import admin, metrics
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
-import json
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+import database
+import indexes
+from repository.vote import vote_buffer
+from repository.question import counter_buffer
+from utils import kv
+from hashing import hash_pool
+from utils.json_response import FastJSONResponse
+import os
 
 
-# Optional: Safer JSONResponse to detect serialization issues
-class SafeJSONResponse(JSONResponse):
-    def render(self, content: any) -> bytes:
-        def convert_bytes(obj):
-            if isinstance(obj, bytes):
-                try:
-                    return obj.decode("utf-8")
-                except Exception:
-                    return str(obj)
-            if isinstance(obj, dict):
-                return {k: convert_bytes(v) for k, v in obj.items()}
-            if isinstance(obj, list):
-                return [convert_bytes(i) for i in obj]
-            return obj
+# Mongo clients live for the lifetime of the worker process
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.connect()
+    if await database.warm_up() and os.getenv("MONGO_ENSURE_INDEXES", "1") == "1":
+        await indexes.ensure_indexes()
+    vote_buffer.start()
+    counter_buffer.start()
+    yield
+    await vote_buffer.stop()
+    await counter_buffer.stop()
+    await kv.close_all()
+    hash_pool.shutdown()
+    database.close()
 
-        safe_content = convert_bytes(content)
 
-        try:
-            return json.dumps(safe_content).encode("utf-8")
-        except TypeError as e:
-            print("[Serialization ERROR]:", safe_content)
-            raise e
-
-
-app = FastAPI(title="StackIt", debug=True)
+# FastJSONResponse encodes ObjectId, datetime and bytes itself (orjson when
+# installed). As the default it only does the final render; plain returns
+# still pass through jsonable_encoder, see utils/json_response.py
+app = FastAPI(title="StackIt", debug=True, lifespan=lifespan, default_response_class=FastJSONResponse)
 origins = [
     "http://127.0.0.1:5500",  # Local development
     "http://localhost:5500",
@@ -51,6 +55,7 @@ app.add_middleware(
 
 # Routers
 app.include_router(admin.router)
+app.include_router(metrics.router)
 app.include_router(questions.router)
 app.include_router(question.router)
 app.include_router(answers.router)
@@ -61,8 +66,10 @@ app.include_router(notifications_ws.router)
 app.include_router(authentication.router)
 app.include_router(user.router)
 
-# Middleware
+# Middleware, last added runs first: metrics see every request including 429s
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 # Global exception handler
@@ -77,7 +84,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     except Exception:
         body_str = "<Could not decode request body>"
 
-    return SafeJSONResponse(
+    return FastJSONResponse(
         status_code=HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": filtered_errors,
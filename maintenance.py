@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+import database
+from repository.flag import TARGET_COLLECTIONS
+
+
+# Move legacy embedded `flags` arrays into the flags collection and
+# replace them with a flag_count on the target.
+async def migrate_flags():
+    db = database.get_async_db()
+    migrated = {}
+    for target_type, collection in TARGET_COLLECTIONS.items():
+        count = 0
+        cursor = db[collection].find({"flags": {"$exists": True}}, {"flags": 1})
+        async for doc in cursor:
+            ops = [
+                InsertOne({
+                    "target_type": target_type,
+                    "target_id": doc["_id"],
+                    "user_id": flag.get("user_id"),
+                    "by_admin": bool(flag.get("by_admin")),
+                    "reason": flag.get("reason"),
+                    "timestamp": flag.get("timestamp")
+                })
+                for flag in doc.get("flags") or []
+            ]
+            if ops:
+                try:
+                    await db.flags.bulk_write(ops, ordered=False)
+                except BulkWriteError as e:
+                    # duplicate (target, user) pairs are dropped by the unique index
+                    if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+                        raise
+
+            flag_count = await db.flags.count_documents({"target_type": target_type, "target_id": doc["_id"]})
+            await db[collection].update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"flag_count": flag_count}, "$unset": {"flags": ""}}
+            )
+            count += 1
+        migrated[collection] = count
+    return migrated
+
+
+# Backfill sort keys on answers created before post_answer set them
+# (keyset range queries skip documents where the field is missing)
+async def backfill_answer_fields():
+    answers = database.get_async_db().answers
+    result = await answers.update_many(
+        {"score": {"$exists": False}},
+        [{"$set": {
+            "upvotes": {"$ifNull": ["$upvotes", 0]},
+            "downvotes": {"$ifNull": ["$downvotes", 0]},
+            "score": {"$subtract": [{"$ifNull": ["$upvotes", 0]}, {"$ifNull": ["$downvotes", 0]}]}
+        }}]
+    )
+    accepted = await answers.update_many({"is_accepted": {"$exists": False}}, {"$set": {"is_accepted": False}})
+    return {"score": result.modified_count, "is_accepted": accepted.modified_count}
+
+
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "8"))
+RECONCILE_BATCH = 1000
+
+
+# Recompute answer_count, score and last_activity_at from the answers
+# collection for questions whose _id falls in [low, high) ([low, high] for the last range)
+async def _reconcile_range(low, high, last: bool):
+    db = database.get_async_db()
+    id_range = {"$gte": low, "$lte" if last else "$lt": high}
+    totals = {}
+    async for row in db.answers.aggregate([
+        {"$match": {"question_id": id_range}},
+        {"$group": {
+            "_id": "$question_id",
+            "answer_count": {"$sum": 1},
+            "score": {"$sum": {"$ifNull": ["$score", 0]}},
+            "last_answer_at": {"$max": "$timestamp"}
+        }}
+    ]):
+        totals[row["_id"]] = row
+
+    ops = []
+    fixed = 0
+    async for question in db.questions.find({"_id": id_range}, {"created_at": 1}):
+        row = totals.get(question["_id"], {})
+        last_activity_at = max(
+            filter(None, [question.get("created_at"), row.get("last_answer_at")]),
+            default=None
+        )
+        ops.append(UpdateOne({"_id": question["_id"]}, {"$set": {
+            "answer_count": row.get("answer_count", 0),
+            "score": row.get("score", 0),
+            "last_activity_at": last_activity_at
+        }}))
+        if len(ops) >= RECONCILE_BATCH:
+            fixed += (await db.questions.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        fixed += (await db.questions.bulk_write(ops, ordered=False)).modified_count
+    return fixed
+
+
+# Repair drift in the denormalized question counters. The questions are
+# split into _id ranges with $bucketAuto and the ranges run concurrently.
+async def reconcile_questions():
+    db = database.get_async_db()
+    buckets = await db.questions.aggregate([
+        {"$bucketAuto": {"groupBy": "$_id", "buckets": RECONCILE_WORKERS}}
+    ]).to_list(length=None)
+
+    fixed = await asyncio.gather(*(
+        _reconcile_range(bucket["_id"]["min"], bucket["_id"]["max"], i == len(buckets) - 1)
+        for i, bucket in enumerate(buckets)
+    ))
+    return {"ranges": len(buckets), "modified": sum(fixed)}
+
+
+COMMANDS = {
+    "migrate-flags": migrate_flags,
+    "backfill-answers": backfill_answer_fields,
+    "reconcile-questions": reconcile_questions,
+}
+
+
+async def _main(command):
+    if command not in COMMANDS:
+        print(f"usage: python maintenance.py [{'|'.join(COMMANDS)}]")
+        return 2
+    database.connect()
+    try:
+        print(await COMMANDS[command]())
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -0,0 +1,44 @@
+import time
+from utils.metrics import request_metrics
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# Records each HTTP request's duration, up to its last body chunk, and its
+# response size under its route template (e.g. /questions/{question_id}) so
+# labels stay bounded. Messages are passed on as they come, nothing is buffered.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        request_metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            request_metrics.in_flight -= 1
+            # The router sets scope["route"] on the shared scope dict
+            route = scope.get("route")
+            request_metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started,
+                size,
+            )
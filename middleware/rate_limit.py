@@ -1,21 +1,146 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import os
 from time import time
+from typing import NamedTuple
+from fastapi.responses import JSONResponse
+from starlette.requests import HTTPConnection
+from utils.auth import decode_access_token
+from utils.kv import create_backend
+from utils.metrics import register_gauge
 
-RATE_LIMIT = {}  # IP: [timestamps]
-REQUESTS_PER_MINUTE = 30
+# Hard cap on limiter keys held in memory (one or two per active client and
+# policy); the least recently seen are evicted first. Ignored with CACHE_URL=redis://
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        ip = request.client.host
+
+class RateLimitPolicy(NamedTuple):
+    limit: int
+    window: int
+
+
+# "<requests>/<seconds>", e.g. RATE_LIMIT_AUTH=10/60
+def _policy(env: str, default: str):
+    limit, window = os.getenv(env, default).split("/")
+    return RateLimitPolicy(int(limit), int(window))
+
+
+# Every limit lives here. Clients are counted per policy, by user_id when
+# the request carries a valid JWT and by IP otherwise.
+POLICIES = {
+    # bcrypt on every call
+    "auth": _policy("RATE_LIMIT_AUTH", "10/60"),
+    "writes": _policy("RATE_LIMIT_WRITES", "60/60"),
+    "reads": _policy("RATE_LIMIT_READS", "300/60"),
+    "websocket": _policy("RATE_LIMIT_WEBSOCKET", "20/60"),
+}
+
+# Route groups, first match wins: (policy, scope type, methods or None for any, path prefixes)
+ROUTE_GROUPS = [
+    ("auth", "http", None, ("/login", "/auth/")),
+    ("websocket", "websocket", None, ("/",)),
+    ("reads", "http", {"GET", "HEAD", "OPTIONS"}, ("/",)),
+    ("writes", "http", None, ("/",)),
+]
+
+
+def route_group(scope):
+    path = scope["path"]
+    for policy, scope_type, methods, prefixes in ROUTE_GROUPS:
+        if scope["type"] != scope_type:
+            continue
+        if methods is not None and scope.get("method") not in methods:
+            continue
+        if path.startswith(prefixes):
+            return policy
+    return None
+
+
+# user_id from a Bearer header (or the ?token= the WebSocket uses), else the client IP
+async def client_key(conn: HTTPConnection):
+    authorization = conn.headers.get("authorization", "")
+    token = authorization[7:] if authorization[:7].lower() == "bearer " else conn.query_params.get("token")
+    if token:
+        payload = await decode_access_token(token)
+        if payload and payload.get("user_id"):
+            return f"u:{payload['user_id']}"
+    return f"ip:{conn.client.host if conn.client else 'unknown'}"
+
+
+# Sliding window counter: one counter per client per fixed window, and the
+# rate is estimated as the current count plus the previous window's count
+# weighted by how much of it still overlaps the sliding window. Only allowed
+# requests are counted: a rejected one is taken back off, so a client that
+# keeps retrying recovers as soon as its rate drops. Counters expire after
+# two windows.
+class SlidingWindowLimiter:
+    def __init__(self, backend, limit: int, window: int, name: str = "rl"):
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+        self.name = name
+
+    # Count a request for `key`. Returns 0 if it is allowed, otherwise the
+    # seconds until it would be.
+    async def hit(self, key: str):
         now = time()
-        timestamps = RATE_LIMIT.get(ip, [])
-        timestamps = [ts for ts in timestamps if now - ts < 60]
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        current_key = f"{self.name}:{key}:{index}"
+        # incr first so concurrent workers can't all pass the same check
+        current = await self.backend.incr(current_key, 1, ttl=2 * self.window)
+        previous = int(await self.backend.get(f"{self.name}:{key}:{index - 1}") or 0)
+
+        weight = 1 - elapsed / self.window
+        if previous * weight + current <= self.limit:
+            return 0
+        await self.backend.incr(current_key, -1, ttl=2 * self.window)
+
+        # `current` still counts this request: when would it have fitted?
+        if current <= self.limit:
+            # Once enough of the previous window has slid out
+            wait = self.window * (1 - (self.limit - current) / previous) - elapsed
+        else:
+            # Only in the next window, once the current one (current - 1
+            # allowed requests) has slid out enough to leave room for one more
+            wait = (self.window - elapsed) + self.window * (1 - (self.limit - 1) / (current - 1))
+        return max(1, math.ceil(wait))
+
+
+rate_limit_store = create_backend(max_entries=RATE_LIMIT_MAX_KEYS)
+# Only known for the in-memory backend
+register_gauge(
+    "rate_limiter_keys", "Rate limiter counters held in memory.", lambda: rate_limit_store.snapshot().get("keys")
+)
+limiters = {
+    name: SlidingWindowLimiter(rate_limit_store, policy.limit, policy.window, name=f"rl:{name}")
+    for name, policy in POLICIES.items()
+}
+
+
+def too_many_requests(retry_after: int):
+    return JSONResponse(
+        {"detail": "Too many requests"},
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+# Plain ASGI rather than BaseHTTPMiddleware, which never sees WebSocket
+# handshakes. A limited handshake is closed before it is accepted (HTTP 403).
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
 
-        if len(timestamps) >= REQUESTS_PER_MINUTE:
-            raise HTTPException(status_code=429, detail="Too many requests")
+    async def __call__(self, scope, receive, send):
+        policy = route_group(scope) if scope["type"] in ("http", "websocket") else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
 
-        timestamps.append(now)
-        RATE_LIMIT[ip] = timestamps
-        response = await call_next(request)
-        return response
+        retry_after = await limiters[policy].hit(await client_key(HTTPConnection(scope)))
+        if not retry_after:
+            await self.app(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+        else:
+            await too_many_requests(retry_after)(scope, receive, send)
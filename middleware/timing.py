@@ -0,0 +1,26 @@
+import time
+
+
+# Adds `Server-Timing: app;dur=<ms>`, the time until the response started.
+# Only the response start message is touched; body chunks and WebSocket
+# traffic pass straight through.
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", b"app;dur=%.3f" % elapsed))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,69 @@
+from utils.projection import Field, Projection, isoformat, object_id_str
+
+# API output shape of each resource, see utils/projection.py
+
+QUESTION = Projection("question", {
+    "_id": object_id_str,
+    "title": None,
+    "description": None,
+    "tags": Field(default=()),
+    "author_id": object_id_str,
+    "attachment_url": None,
+    "created_at": isoformat,
+    "last_activity_at": isoformat,
+    "answer_count": Field(default=0),
+    "score": Field(default=0),
+})
+
+# Admin listing: adds the moderation state
+ADMIN_QUESTION = Projection("admin_question", {
+    **QUESTION.fields,
+    "flagged": Field(default=False),
+    "status": None,
+    "flag_count": Field(default=0),
+})
+
+ANSWER = Projection("answer", {
+    "_id": object_id_str,
+    "question_id": object_id_str,
+    "user_id": object_id_str,
+    "content": None,
+    "timestamp": isoformat,
+    "upvotes": Field(default=0),
+    "downvotes": Field(default=0),
+    "score": Field(default=0),
+    "is_accepted": Field(default=False),
+})
+
+NOTIFICATION = Projection("notification", {
+    "_id": object_id_str,
+    "user_id": object_id_str,
+    "question_id": object_id_str,
+    "answer_id": object_id_str,
+    "type": Field(default="generic"),
+    "message": Field(default="You have a new notification"),
+    "is_read": Field(default=False),
+    "timestamp": isoformat,
+})
+
+# Admin user listing; the password hash is not fetched
+ADMIN_USER = Projection("admin_user", {
+    "_id": object_id_str,
+    "name": None,
+    "email": None,
+    "status": Field(default="active"),
+    "created_at": isoformat,
+})
+
+FLAGGED_QUESTION = Projection("flagged_question", {
+    "question_id": Field(object_id_str, source="_id"),
+    "title": Field(default="N/A"),
+    "description": Field(default="N/A"),
+    "status": Field(default="N/A"),
+})
+
+FLAGGED_ANSWER = Projection("flagged_answer", {
+    "answer_id": Field(object_id_str, source="_id"),
+    "content": Field(default=""),
+    "status": Field(default="unknown"),
+})
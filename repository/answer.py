@@ -0,0 +1,37 @@
+from bson import ObjectId
+from database import get_async_db
+from utils.pagination import keyset_filter, keyset_page
+from models.projections import ANSWER
+
+# Sort modes for a question's answers; each one is backed by a
+# (question_id, ...) index in indexes.py
+ANSWER_SORTS = {
+    "score": [("score", -1), ("_id", -1)],
+    "newest": [("_id", -1)],
+    "oldest": [("_id", 1)],
+    "accepted": [("is_accepted", -1), ("score", -1), ("_id", -1)],
+}
+
+
+async def get(answer_id: ObjectId):
+    return await get_async_db().answers.find_one({"_id": answer_id})
+
+
+async def create(answer: dict):
+    result = await get_async_db().answers.insert_one(answer)
+    return result.inserted_id
+
+
+# One page of a question's answers in their API shape. Returns (answers, next_cursor).
+async def list_for_question(question_id: ObjectId, sort_mode: str, limit: int, after: list = None):
+    sort = ANSWER_SORTS[sort_mode]
+    query = {"question_id": question_id}
+    if after:
+        query.update(keyset_filter(sort, after))
+
+    cursor = get_async_db().answers.find(query, ANSWER.mongo).sort(sort).limit(limit + 1)
+    return await keyset_page(cursor, sort, limit, ANSWER.convert)
+
+
+async def accept(answer_id: ObjectId):
+    return await get_async_db().answers.update_one({"_id": answer_id}, {"$set": {"is_accepted": True}})
@@ -0,0 +1,33 @@
+from bson import ObjectId
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from database import get_async_db
+
+# Collection holding each flag target type
+TARGET_COLLECTIONS = {"question": "questions", "answer": "answers"}
+
+
+# Record one flag per (target, user). The unique index on the flags
+# collection does the dedupe, the target only keeps a counter.
+async def add(target_type: str, target_id: ObjectId, user_id: str, reason: str):
+    db = get_async_db()
+    try:
+        await db.flags.insert_one({
+            "target_type": target_type,
+            "target_id": target_id,
+            "user_id": user_id,
+            "by_admin": False,
+            "reason": reason,
+            "timestamp": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        return False
+
+    await db[TARGET_COLLECTIONS[target_type]].update_one(
+        {"_id": target_id},
+        {
+            "$set": {"flagged": True, "status": "reported"},
+            "$inc": {"flag_count": 1}
+        }
+    )
+    return True
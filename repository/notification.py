@@ -0,0 +1,33 @@
+from bson import ObjectId
+from database import get_async_db, PROJECTION_PUSHDOWN
+from models.projections import NOTIFICATION
+
+
+# Try both ObjectId and string for user_id compatibility
+def _user_query(user_id: str):
+    try:
+        object_id = ObjectId(user_id)
+        return {"user_id": {"$in": [object_id, user_id]}}
+    except Exception:
+        return {"user_id": user_id}
+
+
+async def list_for_user(user_id: str):
+    if PROJECTION_PUSHDOWN:
+        cursor = get_async_db().notifications.find(_user_query(user_id), NOTIFICATION.pushdown).sort("timestamp", -1)
+        return await cursor.to_list(length=None)
+
+    cursor = get_async_db().notifications.find(_user_query(user_id), NOTIFICATION.mongo).sort("timestamp", -1)
+    return await NOTIFICATION.to_list(cursor)
+
+
+async def create(notification: dict):
+    result = await get_async_db().notifications.insert_one(notification)
+    return result.inserted_id
+
+
+async def mark_all_read(user_id: str):
+    return await get_async_db().notifications.update_many(
+        _user_query(user_id),
+        {"$set": {"is_read": True}}
+    )
@@ -0,0 +1,76 @@
+import os
+from bson import ObjectId
+from datetime import datetime
+from database import get_async_db, PROJECTION_PUSHDOWN
+from utils.pagination import keyset_filter, keyset_page
+from utils.write_buffer import WriteBehindBuffer
+from utils.response_cache import invalidate_question
+from models.projections import QUESTION
+
+# Sort modes for GET /questions, each backed by an index in indexes.py
+QUESTION_SORTS = {
+    "newest": [("created_at", -1), ("_id", -1)],
+    "active": [("last_activity_at", -1), ("_id", -1)],
+    "score": [("score", -1), ("_id", -1)],
+}
+
+async def _scores_flushed(question_ids):
+    for question_id in question_ids:
+        await invalidate_question(question_id, "score")
+
+
+# Question score is the sum of its answers' scores; vote deltas are
+# coalesced here like the answer counters in repository/vote.py. Cached
+# responses are dropped once the new score is written, not before.
+counter_buffer = WriteBehindBuffer(
+    lambda: get_async_db().questions,
+    interval=int(os.getenv("VOTE_BUFFER_INTERVAL_MS", "250")) / 1000,
+    max_events=int(os.getenv("VOTE_BUFFER_MAX_EVENTS", "500")),
+    max_keys=int(os.getenv("VOTE_BUFFER_MAX_KEYS", "10000")),
+    on_flush=_scores_flushed,
+)
+
+
+# One page of questions in their API shape. Returns (questions, next_cursor).
+async def list_page(sort_mode: str, limit: int, after: list = None, unanswered: bool = False):
+    sort = QUESTION_SORTS[sort_mode]
+    query = {"answer_count": 0} if unanswered else {}
+    if after:
+        query.update(keyset_filter(sort, after))
+
+    if PROJECTION_PUSHDOWN:
+        cursor = get_async_db().questions.find(query, QUESTION.pushdown).sort(sort).limit(limit + 1)
+        return await keyset_page(cursor, sort, limit, cursor_values=QUESTION.cursor_values)
+
+    cursor = get_async_db().questions.find(query, QUESTION.mongo).sort(sort).limit(limit + 1)
+    return await keyset_page(cursor, sort, limit, QUESTION.convert)
+
+
+async def get(question_id: ObjectId):
+    return await get_async_db().questions.find_one({"_id": question_id})
+
+
+# A question in its API shape, or None
+async def show(question_id: ObjectId):
+    question = await get_async_db().questions.find_one({"_id": question_id}, QUESTION.mongo)
+    return QUESTION.convert(question) if question else None
+
+
+async def create(question: dict):
+    question.setdefault("answer_count", 0)
+    question.setdefault("score", 0)
+    question.setdefault("last_activity_at", question["created_at"])
+    result = await get_async_db().questions.insert_one(question)
+    return result.inserted_id
+
+
+async def record_answer(question_id: ObjectId, at: datetime):
+    return await get_async_db().questions.update_one(
+        {"_id": question_id},
+        {"$inc": {"answer_count": 1}, "$max": {"last_activity_at": at}}
+    )
+
+
+async def add_score(question_id: ObjectId, delta: int):
+    if delta:
+        await counter_buffer.add(question_id, {"score": delta})
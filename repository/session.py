@@ -0,0 +1,76 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from database import get_async_db
+
+# A refresh token is good for this long after its session was last used
+REFRESH_TOKEN_TTL_DAYS = int(os.getenv("REFRESH_TOKEN_TTL_DAYS", "30"))
+
+
+def _hash(secret: str):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _sessions():
+    return get_async_db().sessions
+
+
+# Refresh tokens are "<session id>.<secret>"; only a hash of the secret is
+# stored. The TTL index on expires_at removes sessions nobody renewed.
+async def create(user_id: str, email: str):
+    session_id = secrets.token_urlsafe(16)
+    secret = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    await _sessions().insert_one({
+        "_id": session_id,
+        "user_id": user_id,
+        "email": email,
+        "token_hash": _hash(secret),
+        "created_at": now,
+        "last_used_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_TTL_DAYS),
+    })
+    return session_id, f"{session_id}.{secret}"
+
+
+# Swap a refresh token for a new one in a single conditional update, so two
+# concurrent uses can't both succeed. Returns (session, new refresh token),
+# or None. The hash of the secret just retired is kept: presenting it again
+# means the token leaked or was replayed, and the whole session is revoked.
+# Any other mismatch is just rejected; the session id is in every access
+# token, so a guessed secret must not be able to log the user out.
+async def rotate(refresh_token: str):
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id or not secret:
+        return None
+    now = datetime.utcnow()
+    presented = _hash(secret)
+    new_secret = secrets.token_urlsafe(32)
+    session = await _sessions().find_one_and_update(
+        {"_id": session_id, "token_hash": presented, "expires_at": {"$gt": now}},
+        {"$set": {
+            "token_hash": _hash(new_secret),
+            "previous_hash": presented,
+            "last_used_at": now,
+            "expires_at": now + timedelta(days=REFRESH_TOKEN_TTL_DAYS),
+        }},
+        projection={"user_id": 1, "email": 1},
+    )
+    if session is None:
+        await _sessions().delete_one({"_id": session_id, "previous_hash": presented})
+        return None
+    return session, f"{session_id}.{new_secret}"
+
+
+async def revoke(refresh_token: str):
+    session_id, _, secret = refresh_token.partition(".")
+    result = await _sessions().delete_one({"_id": session_id, "token_hash": _hash(secret)})
+    return session_id if result.deleted_count else None
+
+
+async def is_active(session_id: str):
+    session = await _sessions().find_one(
+        {"_id": session_id, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1}
+    )
+    return session is not None
@@ -1,22 +1,38 @@
 from models import schemas
-from database import collection
+from database import get_async_users_collection
 from hashing import Hash
 from fastapi import HTTPException, status
 from bson import ObjectId
 
-def create(user: schemas.User):
-    existing = collection.find_one({"email": user.email})
+async def create(user: schemas.User):
+    existing = await get_async_users_collection().find_one({"email": user.email})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed = Hash.bcrypt(user.password)
+    # bcrypt is CPU bound, it runs on the hash process pool
+    hashed = await Hash.hash(user.password)
     new_user = {"name": user.name, "email": user.email, "password": hashed}
-    res = collection.insert_one(new_user)
+    res = await get_async_users_collection().insert_one(new_user)
     new_user["_id"] = res.inserted_id
     return schemas.ShowUser(**new_user)
 
-def show(user_id: str):
-    user = collection.find_one({"_id": ObjectId(user_id)})
+async def show(user_id: str):
+    user = await get_async_users_collection().find_one({"_id": ObjectId(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return schemas.ShowUser(**user)
+
+async def get_by_email(email: str):
+    return await get_async_users_collection().find_one({"email": email})
+
+async def update_password_hash(user_id: ObjectId, hashed: str):
+    await get_async_users_collection().update_one({"_id": user_id}, {"$set": {"password": hashed}})
+
+# The user's status ("active" when never set), or None if there is no such user
+async def get_status(user_id: str):
+    if not ObjectId.is_valid(user_id):
+        return None
+    user = await get_async_users_collection().find_one({"_id": ObjectId(user_id)}, {"status": 1})
+    if not user:
+        return None
+    return user.get("status", "active")
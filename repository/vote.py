@@ -0,0 +1,120 @@
+import os
+from bson import ObjectId
+from datetime import datetime
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database import get_async_db
+from repository import question as question_repo
+from utils.write_buffer import WriteBehindBuffer
+
+VOTE_LIMIT = int(os.getenv("VOTE_LIMIT", "10"))  # max votes an answer can receive, 0 for no cap
+
+
+# The question's score follows its answers' once their deltas are written:
+# one $in lookup per flush for the question ids, not one read per vote.
+# Buffered new votes (VOTE_LIMIT=0) skip the existence check, so the same
+# lookup finds votes cast on answers that don't exist, or were deleted
+# meanwhile; their $inc matched nothing and their vote records go.
+async def _answers_flushed(deltas: dict):
+    db = get_async_db()
+    found = set()
+    async for answer in db.answers.find({"_id": {"$in": list(deltas)}}, {"question_id": 1}):
+        found.add(answer["_id"])
+        score = deltas[answer["_id"]].get("score")
+        if score and answer.get("question_id"):
+            await question_repo.add_score(answer["question_id"], score)
+    missing = [answer_id for answer_id in deltas if answer_id not in found]
+    if missing:
+        await db.votes.delete_many({"answer_id": {"$in": missing}})
+
+
+# Counter deltas that need no limit check (changed and retracted votes, and
+# every vote when uncapped) are coalesced per answer and flushed in one
+# bulk_write, started and drained by the app lifespan.
+vote_buffer = WriteBehindBuffer(
+    lambda: get_async_db().answers,
+    interval=int(os.getenv("VOTE_BUFFER_INTERVAL_MS", "250")) / 1000,
+    max_events=int(os.getenv("VOTE_BUFFER_MAX_EVENTS", "500")),
+    max_keys=int(os.getenv("VOTE_BUFFER_MAX_KEYS", "10000")),
+    on_flush=_answers_flushed,
+)
+
+# New votes only land while upvotes + downvotes is under the limit
+_UNDER_LIMIT = {"$expr": {"$lt": [
+    {"$add": [{"$ifNull": ["$upvotes", 0]}, {"$ifNull": ["$downvotes", 0]}]},
+    VOTE_LIMIT
+]}}
+
+
+# $inc that moves an answer's counters from the old vote to the new one
+def _delta(old: int, new: int):
+    inc = {"upvotes": 0, "downvotes": 0, "score": (new or 0) - (old or 0)}
+    if old == 1:
+        inc["upvotes"] -= 1
+    elif old == -1:
+        inc["downvotes"] -= 1
+    if new == 1:
+        inc["upvotes"] += 1
+    elif new == -1:
+        inc["downvotes"] += 1
+    return {k: v for k, v in inc.items() if v}
+
+
+# A new vote under a cap is checked against the live counters: written
+# straight to the answer, and the same update hands back question_id and
+# proves the answer exists. Any other change, and every vote when uncapped,
+# goes through the buffer. Returns False when the update matched nothing.
+async def _apply(answer_id: ObjectId, old: int, new: int):
+    delta = _delta(old, new)
+    if old is not None or not VOTE_LIMIT:
+        await vote_buffer.add(answer_id, delta)
+        return True
+
+    answer = await get_async_db().answers.find_one_and_update(
+        {"_id": answer_id, **_UNDER_LIMIT}, {"$inc": delta}, projection={"question_id": 1}
+    )
+    if answer is None:
+        return False
+    if answer.get("question_id"):
+        await question_repo.add_score(answer["question_id"], delta.get("score", 0))
+    return True
+
+
+async def _swap_vote(answer_id: ObjectId, user_id: str, value: int):
+    try:
+        return await get_async_db().votes.find_one_and_update(
+            {"answer_id": answer_id, "user_id": user_id},
+            {"$set": {"value": value, "timestamp": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # Lost a concurrent first-vote upsert race, the document exists now
+        return await _swap_vote(answer_id, user_id, value)
+
+
+# Record, or change, the user's vote. The votes collection dedupes per
+# user, the answer counters move by the difference (see _apply).
+async def cast(answer_id: ObjectId, user_id: str, value: int):
+    db = get_async_db()
+    previous = await _swap_vote(answer_id, user_id, value)
+    old = previous["value"] if previous else None
+    if old == value:
+        return False
+
+    if await _apply(answer_id, old, value):
+        return True
+
+    # Only a new vote under a cap can be refused: undo its record and say why
+    await db.votes.delete_one({"answer_id": answer_id, "user_id": user_id})
+    if not await db.answers.find_one({"_id": answer_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Answer not found")
+    raise HTTPException(status_code=403, detail=f"Vote limit reached ({VOTE_LIMIT} votes max)")
+
+
+async def retract(answer_id: ObjectId, user_id: str):
+    previous = await get_async_db().votes.find_one_and_delete({"answer_id": answer_id, "user_id": user_id})
+    if not previous:
+        raise HTTPException(status_code=404, detail="No vote to retract")
+    await _apply(answer_id, previous["value"], None)
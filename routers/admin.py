@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends,HTTPException,Form,Body
+from fastapi import APIRouter, Depends,HTTPException,Form,Body,Query
+from typing import Optional
 
 from services import admin_service
-from database import db
+from database import get_db
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import secrets
 from services.admin_service import get_all_flagged_answers
 from bson import ObjectId
+from utils.mongo_pool import pool_stats
+from utils.mongo_monitor import command_monitor
+import database
+import indexes
+from repository.vote import vote_buffer
+from repository.question import counter_buffer
+from utils.response_cache import response_cache
+from utils.auth import user_status_cache
+from anyio import from_thread
+from utils.pagination import MAX_PAGE_SIZE
+from utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -25,16 +37,52 @@ async def get_admin_stats():
         "total_questions": 50,
         "total_answers": 120
     }
+# Connection pool checkout waits, used to size MONGO_MAX_POOL_SIZE per worker
+@router.get("/db/pool")
+def admin_get_pool_stats(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return {
+        "max_pool_size": database.MONGO_MAX_POOL_SIZE,
+        "min_pool_size": database.MONGO_MIN_POOL_SIZE,
+        "compressors": database.available_compressors(),
+        **pool_stats.snapshot()
+    }
+
+# Slowest recent Mongo commands, newest first, with literal values redacted
+@router.get("/db/slow-commands")
+def admin_get_slow_commands(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return {
+        "threshold_ms": command_monitor.slow_ms,
+        "explain": command_monitor.explain,
+        "data": command_monitor.slow_commands(),
+    }
+
+@router.delete("/db/slow-commands")
+def admin_clear_slow_commands(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    command_monitor.clear()
+    return {"message": "Slow command buffer cleared"}
+
+# Write-behind vote buffers: flush sizes, latency and backpressure
+@router.get("/votes/buffer")
+def admin_get_vote_buffer_stats(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return {"answers": vote_buffer.snapshot(), "questions": counter_buffer.snapshot()}
+
+# Response cache hit/miss/eviction counters
+@router.get("/cache")
+def admin_get_cache_stats(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return response_cache.snapshot()
+
+# Declared indexes that are missing, undeclared or never used
+@router.get("/db/indexes")
+async def admin_get_index_report(credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return await indexes.index_report()
+
 @router.get("/questions")
 def admin_get_questions(credentials: HTTPBasicCredentials = Depends(verify_admin)):
-    return {"data": admin_service.get_all_questions()}
+    return FastJSONResponse({"data": admin_service.get_all_questions()})
 
 @router.get("/users")
 def admin_get_all_users(credentials: HTTPBasicCredentials = Depends(verify_admin)):
-    return {
-        
-        "data": admin_service.get_all_users()
-    }
+    return FastJSONResponse({"data": admin_service.get_all_users()})
 
 
 
@@ -45,7 +93,7 @@ def get_user_details_by_id(user_id: str, credentials=Depends(verify_admin)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user_id format")
 
-    user = db["DB"].find_one({"_id": object_id})
+    user = get_db()["DB"].find_one({"_id": object_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -62,9 +110,11 @@ def get_user_details_by_id(user_id: str, credentials=Depends(verify_admin)):
 
 @router.get("/admin/questions/flagged")
 def get_all_flagged_questions(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     credentials: HTTPBasicCredentials = Depends(verify_admin)
 ):
-    return admin_service.get_all_flagged_questions_with_user_details()
+    return FastJSONResponse(admin_service.get_all_flagged_questions_with_user_details(limit, cursor))
 
 
 
@@ -72,8 +122,12 @@ def get_all_flagged_questions(
 
 
 @router.get("/admin/answers/flagged")
-def admin_get_all_flagged_answers(credentials: HTTPBasicCredentials = Depends(verify_admin)):
-    return get_all_flagged_answers()
+def admin_get_all_flagged_answers(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    credentials: HTTPBasicCredentials = Depends(verify_admin)
+):
+    return FastJSONResponse(get_all_flagged_answers(limit, cursor))
 
 
 @router.patch("/admin/users/{user_id}/status")
@@ -91,13 +145,14 @@ def update_user_status(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user_id format")
 
-    result = db["DB"].update_one(
+    result = get_db()["DB"].update_one(
         {"_id": object_id},
         {"$set": {"status": status}}
     )
 
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    from_thread.run(user_status_cache.invalidate, str(object_id))
 
     return {
         "success": True,
@@ -110,39 +165,7 @@ def admin_flag_question(
     reason: str = Body(..., embed=True),
     credentials=Depends(verify_admin)
 ):
-    try:
-        question_obj_id = ObjectId(question_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid question ID")
-
-    questions_collection = db["questions"]
-    question = questions_collection.find_one({"_id": question_obj_id})
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-
-    update_result = questions_collection.update_one(
-        {"_id": question_obj_id},
-        {
-            "$set": {
-                "flagged": True,
-                "flag_reason": reason,
-                "status": "reported"
-            }
-        }
-    )
-
-    if update_result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Question could not be flagged")
-
-    # Return the flagged question details
-    return {
-        "message": "Question flagged successfully",
-        "question_id": question_id,
-        "status": "reported",
-        "reason": reason,
-        "title": question.get("title", "N/A"),
-        "description": question.get("description", "N/A")
-    }
+    return admin_service.admin_flag_question(question_id, reason)
 
 {
   "message": "Question flagged successfully",
@@ -176,10 +199,16 @@ def admin_delete_user(user_id: str, credentials: HTTPBasicCredentials = Depends(
 def admin_delete_question(question_id: str, credentials: HTTPBasicCredentials = Depends(verify_admin)):
     return admin_service.delete_question_by_id(question_id)
 
+@router.delete("/answers/{answer_id}")
+def admin_delete_answer(answer_id: str, credentials: HTTPBasicCredentials = Depends(verify_admin)):
+    return admin_service.delete_answer_by_id(answer_id)
+
 # Delete all questions
 @router.delete("/admin/delete-all-questions")
 def delete_all_questions(credentials=Depends(verify_admin)):
-    result = db["questions"].delete_many({})
+    result = get_db()["questions"].delete_many({})
+    get_db()["flags"].delete_many({"target_type": "question"})
+    from_thread.run(response_cache.clear)
     return {
         "message": f"Deleted {result.deleted_count} questions"
     }
@@ -187,7 +216,11 @@ def delete_all_questions(credentials=Depends(verify_admin)):
 #  Delete all answers
 @router.delete("/admin/delete-all-answers")
 def delete_all_answers(credentials=Depends(verify_admin)):
-    result = db["answers"].delete_many({})
+    result = get_db()["answers"].delete_many({})
+    get_db()["flags"].delete_many({"target_type": "answer"})
+    get_db()["votes"].delete_many({})
+    get_db()["questions"].update_many({}, {"$set": {"answer_count": 0, "score": 0}})
+    from_thread.run(response_cache.clear)
     return {
         "message": f"Deleted {result.deleted_count} answers"
     }
@@ -1,25 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, HTTPException, Depends, Query
 from bson import ObjectId
-from database import db
+from repository import question as question_repo
+from repository import answer as answer_repo
+from repository import notification as notification_repo
 from models.answer import Answer
 from routers.notifications_ws import send_notification
-from utils.auth import decode_access_token
+from utils.auth import get_current_user
 from datetime import datetime
+from typing import Literal, Optional
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from utils.response_cache import invalidate_question, invalidate_notifications
+from utils.json_response import FastJSONResponse
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 router = APIRouter(tags=["Answers"])
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return payload  # contains user_id, email, etc.
-
 @router.post("/answers")
 async def post_answer(answer: Answer, current_user=Depends(get_current_user)):
     user_id = current_user["user_id"]
@@ -31,7 +25,7 @@ async def post_answer(answer: Answer, current_user=Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="Invalid question_id format")
 
     #  Check if question exists
-    question = db.questions.find_one({"_id": question_obj_id})
+    question = await question_repo.get(question_obj_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
@@ -40,18 +34,24 @@ async def post_answer(answer: Answer, current_user=Depends(get_current_user)):
         "question_id": question_obj_id,
         "user_id": ObjectId(user_id),
         "content": answer.content,
-        "timestamp": datetime.utcnow()
+        "timestamp": datetime.utcnow(),
+        # Sort keys for GET /questions/{id}/answers, must never be missing
+        "upvotes": 0,
+        "downvotes": 0,
+        "score": 0,
+        "is_accepted": False
     }
 
     # Save answer
-    result = db.answers.insert_one(answer_data)
-    answer_id = result.inserted_id
+    answer_id = await answer_repo.create(answer_data)
+    await question_repo.record_answer(question_obj_id, answer_data["timestamp"])
+    await invalidate_question(question_obj_id, "active")
 
     #  Skip notification if user answers their own question
     question_owner_id = str(question["author_id"])
     if question_owner_id != user_id:
         #  Save notification in DB
-        db.notifications.insert_one({
+        await notification_repo.create({
             "user_id": question["author_id"],
             "question_id": question_obj_id,
             "answer_id": answer_id,
@@ -59,6 +59,7 @@ async def post_answer(answer: Answer, current_user=Depends(get_current_user)):
             "is_read": False,
             "timestamp": datetime.utcnow()
         })
+        await invalidate_notifications(question_owner_id)
 
         #  Send WebSocket notification
         await send_notification(question_owner_id, {
@@ -73,3 +74,25 @@ async def post_answer(answer: Answer, current_user=Depends(get_current_user)):
         "message": "Answer posted successfully",
         "answer_id": str(answer_id)
     }
+
+
+# Keyset-paginated answers for a question, see ANSWER_SORTS for the modes
+@router.get("/questions/{question_id}/answers")
+async def get_answers_for_question(
+    question_id: str,
+    sort: Literal["score", "newest", "oldest", "accepted"] = "score",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    if not ObjectId.is_valid(question_id):
+        raise HTTPException(status_code=400, detail="Invalid question ID")
+    question_obj_id = ObjectId(question_id)
+
+    after = decode_cursor(cursor, answer_repo.ANSWER_SORTS[sort]) if cursor else None
+    answers, next_cursor = await answer_repo.list_for_question(question_obj_id, sort, limit, after)
+
+    if not answers and not cursor and not await question_repo.get(question_obj_id):
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    # Already JSON-ready, skip jsonable_encoder
+    return FastJSONResponse({"success": True, "count": len(answers), "data": answers, "next_cursor": next_cursor})
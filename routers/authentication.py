@@ -1,19 +1,57 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Body
 from fastapi.security import OAuth2PasswordRequestForm
-from database import collection
+from repository import user as user_repo
+from repository import session as session_repo
 from hashing import Hash
-from utils.auth import create_access_token  # Not token.create_access_token
+from utils.auth import create_access_token, is_active, session_cache, user_status_cache
 
 router = APIRouter(tags=["Authentication"])
 
 @router.post("/login")
-def login(request: OAuth2PasswordRequestForm = Depends()):
-    user = collection.find_one({"email": request.username})
+async def login(request: OAuth2PasswordRequestForm = Depends()):
+    user = await user_repo.get_by_email(request.username)
     if not user:
         raise HTTPException(status_code=404, detail="Invalid Credentials")
     
-    if not Hash.verify(user["password"], request.password):
+    verified, new_hash = await Hash.verify_and_update(user["password"], request.password)
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect password")
+    # Stored with another bcrypt cost factor: upgrade it now that we have the password
+    if new_hash:
+        await user_repo.update_password_hash(user["_id"], new_hash)
 
-    access_token = create_access_token(data={"user_id": str(user["_id"]), "email": user["email"]})
-    return {"access_token": access_token, "token_type": "bearer"}
+    session_id, refresh_token = await session_repo.create(str(user["_id"]), user["email"])
+    return _tokens(str(user["_id"]), user["email"], session_id, refresh_token)
+
+
+def _tokens(user_id: str, email: str, session_id: str, refresh_token: str):
+    access_token = create_access_token(data={"user_id": user_id, "email": email, "sid": session_id})
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# New access token without a password (and so without bcrypt). The refresh
+# token is single use: the response carries its replacement.
+@router.post("/auth/refresh")
+async def refresh(refresh_token: str = Body(..., embed=True)):
+    rotated = await session_repo.rotate(refresh_token)
+    if rotated is None:
+        # A replayed token revokes its session; stop its access tokens here
+        # too (for any other mismatch this only drops a cached entry)
+        await session_cache.invalidate(refresh_token.partition(".")[0])
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+    session, new_refresh_token = rotated
+    user_status = await user_status_cache.get(session["user_id"])
+    if not is_active(user_status):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Account {user_status or 'not found'}")
+    return _tokens(session["user_id"], session["email"], session["_id"], new_refresh_token)
+
+
+# Ends the session: its refresh token stops working and so do the access
+# tokens issued for it
+@router.post("/auth/logout")
+async def logout(refresh_token: str = Body(..., embed=True)):
+    session_id = await session_repo.revoke(refresh_token)
+    if session_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+    await session_cache.invalidate(session_id)
+    return {"message": "Logged out"}
@@ -1,27 +1,16 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, status
+from fastapi import APIRouter, HTTPException, Body, Depends
 from bson import ObjectId
-from datetime import datetime
-from database import db
-from utils.auth import get_current_user  # This should return the user dict with "user_id"
-from fastapi.security import OAuth2PasswordBearer
-from utils.auth import decode_access_token
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+from repository import question as question_repo
+from repository import answer as answer_repo
+from repository import flag as flag_repo
+from utils.response_cache import invalidate_question
+from utils.auth import get_current_user
 
 router = APIRouter(tags=["Users Can Flag a Question and Answer "])
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return payload  # contains user_id, email, etc.
-
 
 @router.post("/questions/{question_id}/flag")
-def user_flag_question(
+async def user_flag_question(
     question_id: str,
     reason: str = Body(..., embed=True),
     current_user: dict = Depends(get_current_user)
@@ -31,30 +20,15 @@ def user_flag_question(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid question ID")
 
-    questions_collection = db["questions"]
-    question = questions_collection.find_one({"_id": question_obj_id})
+    question = await question_repo.get(question_obj_id)
 
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    # Build the flag entry
-    flag_entry = {
-        "user_id": current_user["user_id"],  
-        "reason": reason,
-        "timestamp": datetime.utcnow()
-    }
-
     # Add the flag to the question
-    update_result = questions_collection.update_one(
-        {"_id": question_obj_id},
-        {
-            "$set": {"flagged": True, "status": "reported"},
-            "$push": {"flags": flag_entry}
-        }
-    )
-
-    if update_result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to flag question")
+    if not await flag_repo.add("question", question_obj_id, current_user["user_id"], reason):
+        raise HTTPException(status_code=400, detail="You already flagged this question")
+    await invalidate_question(question_obj_id)
 
     return {
         "message": "Question flagged successfully",
@@ -64,7 +38,7 @@ def user_flag_question(
 
 
 @router.patch("/answers/{answer_id}/flag")
-def user_flag_answer(
+async def user_flag_answer(
     answer_id: str,
     reason: str = Body(..., embed=True),
     current_user: dict = Depends(get_current_user)
@@ -74,36 +48,14 @@ def user_flag_answer(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid answer ID")
 
-    answers_collection = db["answers"]
-    answer = answers_collection.find_one({"_id": answer_obj_id})
+    answer = await answer_repo.get(answer_obj_id)
 
     if not answer:
         raise HTTPException(status_code=404, detail="Answer not found")
 
-    # Check if the user already flagged this answer
-    existing_flags = answer.get("flags", [])
-    for flag in existing_flags:
-        if flag["user_id"] == current_user["user_id"]:
-            raise HTTPException(status_code=400, detail="You already flagged this answer")
-
-    # Flag entry
-    flag_entry = {
-        "user_id": current_user["user_id"],
-        "reason": reason,
-        "timestamp": datetime.utcnow()
-    }
-
-    # Update the answer with the flag
-    update_result = answers_collection.update_one(
-        {"_id": answer_obj_id},
-        {
-            "$set": {"flagged": True, "status": "reported"},
-            "$push": {"flags": flag_entry}
-        }
-    )
-
-    if update_result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to flag answer")
+    # Add the flag, rejected by the unique index if the user already flagged this answer
+    if not await flag_repo.add("answer", answer_obj_id, current_user["user_id"], reason):
+        raise HTTPException(status_code=400, detail="You already flagged this answer")
 
     return {
         "message": "Answer flagged successfully",
@@ -1,64 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from bson import ObjectId
-from database import db
-from utils.auth import decode_access_token
-from fastapi.security import OAuth2PasswordBearer
-from datetime import datetime
+from fastapi import APIRouter, Depends, Request
+from repository import notification as notification_repo
+from utils.auth import get_current_user
+from utils.response_cache import response_cache, cached_response, cache_response, notifications_tag, invalidate_notifications
 
 router = APIRouter(tags=["Notification"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return payload
-
-#  Get all notifications (secure)
+#  Get all notifications (secure), 304 on a matching If-None-Match while cached
 @router.get("/notifications")
-def get_notifications(current_user=Depends(get_current_user)):
+async def get_notifications(request: Request, current_user=Depends(get_current_user)):
     user_id = current_user["user_id"]
+    cache_key = notifications_tag(user_id)
+    cached = await cached_response(request, cache_key, "private, no-cache")
+    if cached is not None:
+        return cached
 
-    # Try both ObjectId and string for user_id compatibility
-    try:
-        object_id = ObjectId(user_id)
-        query = {"user_id": {"$in": [object_id, user_id]}}
-    except Exception:
-        query = {"user_id": user_id}
-
-    notifications = list(db.notifications.find(query).sort("timestamp", -1))
-
-    for n in notifications:
-        n["_id"] = str(n["_id"])
-        n["user_id"] = str(n["user_id"])
-        n["question_id"] = str(n.get("question_id")) if n.get("question_id") else None
-        n["answer_id"] = str(n.get("answer_id")) if n.get("answer_id") else None
-        n["timestamp"] = n.get("timestamp").isoformat() if n.get("timestamp") else None
-        n["type"] = n.get("type", "generic")
-        n["message"] = n.get("message", "You have a new notification")
-
-    return notifications
+    versions = await response_cache.versions([cache_key])
+    notifications = await notification_repo.list_for_user(user_id)
+    return await cache_response(request, cache_key, notifications, [cache_key], versions, "private, no-cache")
 
 #  Mark all as read (secure)
 @router.post("/notifications/mark_read")
-def mark_notifications_read(current_user=Depends(get_current_user)):
+async def mark_notifications_read(current_user=Depends(get_current_user)):
     user_id = current_user["user_id"]
-
-    try:
-        object_id = ObjectId(user_id)
-        query = {"user_id": {"$in": [object_id, user_id]}}
-    except Exception:
-        query = {"user_id": user_id}
-
-    result = db.notifications.update_many(
-        query,
-        {"$set": {"is_read": True}}
-    )
+    result = await notification_repo.mark_all_read(user_id)
+    await invalidate_notifications(user_id)
 
     return {
         "message": "All notifications marked as read",
@@ -1,12 +1,14 @@
-from fastapi import WebSocket, APIRouter, WebSocketDisconnect, status
+from fastapi import WebSocket, APIRouter, WebSocketDisconnect, HTTPException, status
 from typing import Dict
-from utils.auth import decode_access_token
+from utils.auth import authenticate
 import json
+from utils.metrics import register_gauge
 
 router = APIRouter(tags=["Notification"])
 
 # In-memory user connections
 connections: Dict[str, WebSocket] = {}
+register_gauge("websocket_connections", "Open notification WebSockets in this worker.", lambda: len(connections))
 
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
@@ -15,8 +17,11 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    payload = decode_access_token(token)
-    if not payload or payload.get("user_id") != user_id:
+    try:
+        payload = await authenticate(token)
+    except HTTPException:
+        payload = None
+    if not payload or payload["user_id"] != user_id:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
@@ -7,7 +7,8 @@ from cloudinary.uploader import unsigned_upload
 from fastapi.responses import JSONResponse
 from bson import ObjectId
 from dotenv import load_dotenv
-from database import db
+from repository import question as question_repo
+from utils.response_cache import invalidate_question_lists
 from utils.auth import get_current_user  # Import from utils
 from fastapi.security import OAuth2PasswordBearer
 
@@ -67,7 +68,8 @@ async def post_question(
         }
 
         # Insert into DB
-        result = db.questions.insert_one(question)
+        question_id = await question_repo.create(question)
+        await invalidate_question_lists()
 
         # Return success response
         return JSONResponse({
@@ -75,7 +77,7 @@ async def post_question(
             "filename": file.filename if file else None,
             "message": "Question posted successfully!",
             "data": {
-                "question_id": str(result.inserted_id),
+                "question_id": str(question_id),
                 "title": title.strip(),
                 "description": description.strip(),
                 "tags": tags,
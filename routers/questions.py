@@ -1,5 +1,5 @@
 import os
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Request
 from typing import Optional
 from datetime import datetime
 import cloudinary
@@ -7,8 +7,13 @@ from cloudinary.uploader import unsigned_upload
 from fastapi.responses import JSONResponse
 from bson import ObjectId
 from dotenv import load_dotenv
-from database import db
+from repository import question as question_repo
 from utils.auth import get_current_user
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from typing import Literal
+from utils.response_cache import (
+    response_cache, cached_response, cache_response, question_tag, question_list_tag, QUESTION_LISTS, invalidate_question_lists
+)
 
 # Load environment variables
 load_dotenv()
@@ -22,34 +27,52 @@ cloudinary.config(
     api_key=os.getenv("CLOUDINARY_API_KEY"),
     api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
+# Keyset pagination on (sort key, _id): pass back next_cursor to get the next page.
+# sort=active orders by last_activity_at, unanswered=true keeps answer_count == 0.
+# Responses carry an ETag; If-None-Match answers 304 straight from the cache.
 @router.get("/questions")
-async def get_all_questions():
+async def get_all_questions(
+    request: Request,
+    sort: Literal["newest", "active", "score"] = "newest",
+    unanswered: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    after = decode_cursor(cursor, question_repo.QUESTION_SORTS[sort]) if cursor else None
+    cache_key = f"questions:{sort}:{unanswered}:{limit}:{cursor}"
+    cached = await cached_response(request, cache_key)
+    if cached is not None:
+        return cached
+    # Taken before the read, see utils/response_cache.py
+    versions = await response_cache.versions([QUESTION_LISTS, question_list_tag(sort)])
     try:
-        questions = list(db.questions.find().sort("created_at", -1))
-        for q in questions:
-            q["_id"] = str(q["_id"])
-            q["author_id"] = str(q["author_id"])
-            q["created_at"] = q["created_at"].isoformat()
-        return {"success": True, "count": len(questions), "data": questions}
+        questions, next_cursor = await question_repo.list_page(sort, limit, after, unanswered)
+        content = {"success": True, "count": len(questions), "data": questions, "next_cursor": next_cursor}
     except Exception as e:
         print("Error fetching questions:", e)
         raise HTTPException(status_code=500, detail="Failed to fetch questions")
 
+    # Tagged with every question on the page, see utils/response_cache.py
+    tags = [QUESTION_LISTS, question_list_tag(sort)] + [question_tag(q["_id"]) for q in questions]
+    return await cache_response(request, cache_key, content, tags, versions)
+
 @router.get("/questions/{question_id}")
-async def get_question_by_id(question_id: str):
+async def get_question_by_id(question_id: str, request: Request):
     try:
         if not ObjectId.is_valid(question_id):
             raise HTTPException(status_code=400, detail="Invalid question ID")
 
-        question = db.questions.find_one({"_id": ObjectId(question_id)})
+        cache_key = question_tag(ObjectId(question_id))
+        cached = await cached_response(request, cache_key)
+        if cached is not None:
+            return cached
+
+        versions = await response_cache.versions([cache_key])
+        question = await question_repo.show(ObjectId(question_id))
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
 
-        question["_id"] = str(question["_id"])
-        question["author_id"] = str(question["author_id"])
-        question["created_at"] = question["created_at"].isoformat()
-
-        return {"success": True, "data": question}
+        return await cache_response(request, cache_key, {"success": True, "data": question}, [cache_key], versions)
     except HTTPException:
         raise
     except Exception as e:
@@ -96,7 +119,8 @@ async def post_question(
         }
 
         # Insert into MongoDB
-        result = db.questions.insert_one(question)
+        question_id = await question_repo.create(question)
+        await invalidate_question_lists()
 
         # Response
         return JSONResponse({
@@ -104,7 +128,7 @@ async def post_question(
             "filename": file.filename if file else None,
             "message": "Question posted successfully!",
             "data": {
-                "question_id": str(result.inserted_id),
+                "question_id": str(question_id),
                 "title": title.strip(),
                 "description": description.strip(),
                 "tags": tags,
@@ -1,20 +1,13 @@
 from fastapi import APIRouter, Query
-from database import db
+from database import get_db
+from models.projections import QUESTION
+from utils.json_response import FastJSONResponse
 
 router = APIRouter()
 
 @router.get("/search")
 def search_questions(q: str = Query(...)):
-    results = list(db.questions.find({"$text": {"$search": q}}))
-    for r in results:
-        r["_id"] = str(r["_id"])
-    return results
+    return FastJSONResponse(
+        list(QUESTION.iter(get_db().questions.find({"$text": {"$search": q}}, QUESTION.mongo)))
+    )
 
-
-# --- routers/questions.py update (pagination) ---
-@router.get("/questions")
-def get_questions(skip: int = 0, limit: int = 10):
-    questions = list(db.questions.find().skip(skip).limit(limit))
-    for q in questions:
-        q["_id"] = str(q["_id"])
-    return questions
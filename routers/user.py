@@ -5,9 +5,9 @@ from repository import user
 router = APIRouter( )
 
 @router.post("/auth/register", response_model=schemas.ShowUser)
-def create_user(request: schemas.User):
-    return user.create(request)
+async def create_user(request: schemas.User):
+    return await user.create(request)
 
 @router.get("/{id}", response_model=schemas.ShowUser)
-def get_user(id: str):
-    return user.show(id)
+async def get_user(id: str):
+    return await user.show(id)
@@ -1,13 +1,12 @@
 from fastapi import APIRouter,HTTPException,Depends
-from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
-from database import db
-from utils.auth import decode_access_token,get_current_user
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+from repository import answer as answer_repo
+from repository import vote as vote_repo
+from utils.auth import get_current_user
 router = APIRouter()
 
 @router.post("/answers/{answer_id}/vote",tags=["Answers"])
-def vote_answer(answer_id: str, vote: int, current_user=Depends(get_current_user)):
+async def vote_answer(answer_id: str, vote: int, current_user=Depends(get_current_user)):
     user_id = current_user["user_id"]
     # Validate vote value
     if vote not in [1, -1]:
@@ -18,26 +17,24 @@ def vote_answer(answer_id: str, vote: int, current_user=Depends(get_current_user
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid answer ID")
 
-    answer = db.answers.find_one({"_id": answer_obj_id})
-    if not answer:
-        raise HTTPException(status_code=404, detail="Answer not found")
+    # Voting again with a different value changes the vote
+    if not await vote_repo.cast(answer_obj_id, user_id, vote):
+        return {"message": "Vote unchanged"}
 
-    # Calculate total votes
-    upvotes = answer.get("upvotes", 0)
-    downvotes = answer.get("downvotes", 0)
-    total_votes = upvotes + downvotes
-
-    if total_votes >= 10:
-        raise HTTPException(status_code=403, detail="Vote limit reached (10 votes max)")
+    return {"message": "Vote recorded"}
 
-    # Apply vote
-    update = {"$inc": {"upvotes": 1}} if vote == 1 else {"$inc": {"downvotes": 1}}
-    db.answers.update_one({"_id": answer_obj_id}, update)
+@router.delete("/answers/{answer_id}/vote",tags=["Answers"])
+async def retract_vote(answer_id: str, current_user=Depends(get_current_user)):
+    try:
+        answer_obj_id = ObjectId(answer_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid answer ID")
 
-    return {"message": "Vote recorded"}
+    await vote_repo.retract(answer_obj_id, current_user["user_id"])
+    return {"message": "Vote retracted"}
 @router.post("/answers/{answer_id}/accept",tags=["Answers"]
 )
-def accept_answer(answer_id: str,current_user=Depends(get_current_user)):
+async def accept_answer(answer_id: str,current_user=Depends(get_current_user)):
     user_id = current_user["user_id"]
-    db.answers.update_one({"_id": ObjectId(answer_id)}, {"$set": {"is_accepted": True}})
+    await answer_repo.accept(ObjectId(answer_id))
     return {"message": "Answer accepted"}
@@ -1,17 +1,20 @@
 from bson import ObjectId
-from database import db
+from database import get_db, PROJECTION_PUSHDOWN
 from fastapi import HTTPException, Depends, Body
-from utils.auth import get_current_user
+from utils.auth import get_current_user, user_status_cache
 from datetime import datetime
+from utils.pagination import keyset_filter, sort_values, encode_cursor, decode_cursor
+from utils.response_cache import invalidate_question
+from anyio import from_thread
+from repository.flag import TARGET_COLLECTIONS
+from models.projections import ADMIN_QUESTION, ADMIN_USER, FLAGGED_QUESTION, FLAGGED_ANSWER
+
+FLAGGED_SORT = [("_id", -1)]
 
 def get_all_questions():
-    questions = db.questions.find().sort("created_at", -1)
-    result = []
-    for q in questions:
-        q["_id"] = str(q["_id"])
-        q["author_id"] = str(q["author_id"])
-        result.append(q)
-    return result
+    if PROJECTION_PUSHDOWN:
+        return list(get_db().questions.find({}, ADMIN_QUESTION.pushdown).sort("created_at", -1))
+    return list(ADMIN_QUESTION.iter(get_db().questions.find({}, ADMIN_QUESTION.mongo).sort("created_at", -1)))
 
 
 def delete_question_by_id(question_id: str):
@@ -20,19 +23,41 @@ def delete_question_by_id(question_id: str):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    result = db.questions.delete_one({"_id": obj_id})
+    result = get_db().questions.delete_one({"_id": obj_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Question not found")
+    get_db().flags.delete_many({"target_type": "question", "target_id": obj_id})
+    from_thread.run(invalidate_question, obj_id)
 
     return {"success": True, "message": "Question deleted"}
 
+
+def delete_answer_by_id(answer_id: str):
+    try:
+        obj_id = ObjectId(answer_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    answer = get_db().answers.find_one_and_delete({"_id": obj_id}, {"question_id": 1, "score": 1})
+    if not answer:
+        raise HTTPException(status_code=404, detail="Answer not found")
+
+    # Keep the question's denormalized counters in step
+    get_db().questions.update_one(
+        {"_id": answer["question_id"]},
+        {"$inc": {"answer_count": -1, "score": -answer.get("score", 0)}}
+    )
+    get_db().votes.delete_many({"answer_id": obj_id})
+    get_db().flags.delete_many({"target_type": "answer", "target_id": obj_id})
+    from_thread.run(invalidate_question, answer["question_id"], "score")
+
+    return {"success": True, "message": "Answer deleted"}
+
 def get_all_users():
-    users_cursor = db.DB.find().sort("created_at", -1)  # Use the actual collection name
-    result = []
-    for user in users_cursor:
-        user["_id"] = str(user["_id"])
-        result.append(user)
-    return result
+    # Use the actual collection name
+    if PROJECTION_PUSHDOWN:
+        return list(get_db().DB.find({}, ADMIN_USER.pushdown).sort("created_at", -1))
+    return list(ADMIN_USER.iter(get_db().DB.find({}, ADMIN_USER.mongo).sort("created_at", -1)))
 
 
 
@@ -41,47 +66,92 @@ def delete_user_by_id(user_id : str):
         object_id = ObjectId(user_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = db.DB.delete_one({"_id": object_id})
+    result = get_db().DB.delete_one({"_id": object_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    # Its tokens stop working now rather than after USER_STATUS_TTL
+    from_thread.run(user_status_cache.invalidate, str(object_id))
 
     return {"success": True, "message": "User deleted"}
 
 
-def get_all_flagged_questions_with_user_details():
-    questions_collection = db["questions"]
-    users_collection = db["DB"]
+# One page of flagged documents (projected), plus the cursor for the next page
+def _flagged_page(collection: str, projection: dict, limit: int, cursor: str = None):
+    query = {"flagged": True}
+    if cursor:
+        query.update(keyset_filter(FLAGGED_SORT, decode_cursor(cursor, FLAGGED_SORT)))
+
+    docs = list(get_db()[collection].find(query, projection).sort(FLAGGED_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(sort_values(docs[-1], FLAGGED_SORT))
+    return docs, next_cursor
+
+
+# All flags for the targets on the page, grouped by target _id, in one query
+def _flags_by_target(target_type: str, docs: list):
+    grouped = {doc["_id"]: [] for doc in docs}
+    if not grouped:
+        return grouped
+    flags = get_db().flags.find(
+        {"target_type": target_type, "target_id": {"$in": list(grouped)}},
+        {"target_id": 1, "user_id": 1, "by_admin": 1, "reason": 1, "timestamp": 1}
+    ).sort("timestamp", 1)
+    for flag in flags:
+        grouped[flag["target_id"]].append(flag)
+    return grouped
+
+
+# Resolve every flagger on the page with a single $in query instead of one find_one per flag
+def _emails_by_user_id(flags_by_target: dict):
+    user_ids = {
+        ObjectId(flag["user_id"])
+        for flags in flags_by_target.values()
+        for flag in flags
+        if flag.get("user_id") and ObjectId.is_valid(flag["user_id"])
+    }
+    if not user_ids:
+        return {}
+    users = get_db()["DB"].find({"_id": {"$in": list(user_ids)}}, {"email": 1})
+    return {str(user["_id"]): user.get("email", "unknown") for user in users}
+
 
-    flagged_questions = questions_collection.find({"flagged": True})
+def get_all_flagged_questions_with_user_details(limit: int = 50, cursor: str = None):
+    flagged_questions, next_cursor = _flagged_page("questions", FLAGGED_QUESTION.mongo, limit, cursor)
+    flags_by_target = _flags_by_target("question", flagged_questions)
+    emails = _emails_by_user_id(flags_by_target)
     result = []
 
     for question in flagged_questions:
-        question_id = str(question["_id"])
-        flags = question.get("flags", [])
+        flags = flags_by_target[question["_id"]]
 
         enriched_flags = []
         for flag in flags:
-            user_info = users_collection.find_one({"_id": ObjectId(flag["user_id"])})
-            if user_info:
+            user_id = flag.get("user_id")
+            if flag.get("by_admin"):
                 enriched_flags.append({
-                    "user_id": flag["user_id"],
-                    "email": user_info.get("email", "unknown"),
+                    "user_id": None,
+                    "email": "admin",
                     "reason": flag.get("reason", "N/A"),
+                    "flagged_by": "admin",
+                    "timestamp": flag.get("timestamp", "N/A")
+                })
+            elif user_id in emails:
+                enriched_flags.append({
+                    "user_id": user_id,
+                    "email": emails[user_id],
+                    "reason": flag.get("reason", "N/A"),
+                    "flagged_by": "user",
                     "timestamp": flag.get("timestamp", "N/A")
                 })
 
-        result.append({
-            "question_id": question_id,
-            "title": question.get("title", "N/A"),
-            "description": question.get("description", "N/A"),
-            "status": question.get("status", "N/A"),
-            "flagged_by_users": enriched_flags
-        })
+        result.append({**FLAGGED_QUESTION.convert(question), "flagged_by_users": enriched_flags})
 
     if not result:
         raise HTTPException(status_code=404, detail="No flagged questions found")
 
-    return result
+    return {"success": True, "count": len(result), "data": result, "next_cursor": next_cursor}
 
 def remove_user_flag_from_question(question_id: str, user_id: str):
     try:
@@ -90,62 +160,92 @@ def remove_user_flag_from_question(question_id: str, user_id: str):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid question_id or user_id")
 
-    questions_collection = db["questions"]
+    questions_collection = get_db()["questions"]
 
-    question = questions_collection.find_one({"_id": question_obj_id})
+    question = questions_collection.find_one({"_id": question_obj_id}, {"_id": 1})
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    # Remove the flag from the "flags" array
-    update_result = questions_collection.update_one(
-        {"_id": question_obj_id},
-        {"$pull": {"flags": {"user_id": str(user_obj_id)}}}
+    # Remove the user's flag document
+    delete_result = get_db().flags.delete_one(
+        {"target_type": "question", "target_id": question_obj_id, "user_id": str(user_obj_id)}
     )
 
-    if update_result.modified_count == 0:
+    if delete_result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Flag not found or already removed")
 
-    # Check if there are any flags left after removal
-    updated_question = questions_collection.find_one({"_id": question_obj_id})
-    if not updated_question.get("flags"):
-        # If no more flags, remove flag status
-        questions_collection.update_one(
-            {"_id": question_obj_id},
-            {"$unset": {"flagged": "", "status": "", "flags": ""}}
-        )
+    questions_collection.update_one({"_id": question_obj_id}, {"$inc": {"flag_count": -1}})
+
+    # If no more flags, remove flag status (conditional, so a concurrent flag
+    # wins; flag_reason marks an admin flag from before admin flags were counted)
+    questions_collection.update_one(
+        {"_id": question_obj_id, "flag_count": {"$lte": 0}, "flag_reason": {"$exists": False}},
+        {"$unset": {"flagged": "", "status": "", "flag_count": ""}}
+    )
+    from_thread.run(invalidate_question, question_obj_id)
 
     return {
         "message": f"Flag by user {user_id} removed from question {question_id}"
     }
 
 
+# Admin flags are flags documents like user flags, without a user_id (so
+# the per-user unique index doesn't apply), and count towards flag_count
+def _admin_flag(target_type: str, target_id: ObjectId, reason: str):
+    get_db().flags.insert_one({
+        "target_type": target_type,
+        "target_id": target_id,
+        "user_id": None,
+        "by_admin": True,
+        "reason": reason,
+        "timestamp": datetime.utcnow()
+    })
+    return get_db()[TARGET_COLLECTIONS[target_type]].update_one(
+        {"_id": target_id},
+        {
+            "$set": {"flagged": True, "status": "reported"},
+            "$inc": {"flag_count": 1}
+        }
+    )
+
+
+def admin_flag_question(question_id: str, reason: str):
+    try:
+        question_obj_id = ObjectId(question_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid question ID")
+
+    question = get_db()["questions"].find_one({"_id": question_obj_id}, {"title": 1, "description": 1})
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    if _admin_flag("question", question_obj_id, reason).modified_count == 0:
+        raise HTTPException(status_code=500, detail="Question could not be flagged")
+    from_thread.run(invalidate_question, question_obj_id)
+
+    return {
+        "message": "Question flagged successfully",
+        "question_id": question_id,
+        "status": "reported",
+        "reason": reason,
+        "title": question.get("title", "N/A"),
+        "description": question.get("description", "N/A")
+    }
+
+
 def admin_flag_answer(answer_id: str, reason: str):
     try:
         answer_obj_id = ObjectId(answer_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid answer ID")
 
-    answers_collection = db["answers"]
+    answers_collection = get_db()["answers"]
 
-    answer = answers_collection.find_one({"_id": answer_obj_id})
+    answer = answers_collection.find_one({"_id": answer_obj_id}, {"_id": 1})
     if not answer:
         raise HTTPException(status_code=404, detail="Answer not found")
 
-    flag_data = {
-        "by_admin": True,
-        "reason": reason,
-        "timestamp": datetime.utcnow()
-    }
-
-    update_result = answers_collection.update_one(
-        {"_id": answer_obj_id},
-        {
-            "$set": {"flagged": True, "status": "reported"},
-            "$push": {"flags": flag_data}
-        }
-    )
-
-    if update_result.modified_count == 0:
+    if _admin_flag("answer", answer_obj_id, reason).modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to flag answer")
 
     return {
@@ -155,21 +255,18 @@ def admin_flag_answer(answer_id: str, reason: str):
     }
 
 
-def get_all_flagged_answers():
-    answers_collection = db["answers"]
-    users_collection = db["DB"]  # Change if your user collection has a different name
-
-    flagged_answers = answers_collection.find({"flagged": True})
+def get_all_flagged_answers(limit: int = 50, cursor: str = None):
+    flagged_answers, next_cursor = _flagged_page("answers", FLAGGED_ANSWER.mongo, limit, cursor)
+    flags_by_target = _flags_by_target("answer", flagged_answers)
+    emails = _emails_by_user_id(flags_by_target)
 
     results = []
     for answer in flagged_answers:
-        answer_id = str(answer["_id"])
-        content = answer.get("content", "")
-        flags = answer.get("flags", [])
+        flags = flags_by_target[answer["_id"]]
 
         enriched_flags = []
         for flag in flags:
-            flagged_by = flag.get("flagged_by", "user")
+            flagged_by = "admin" if flag.get("by_admin") else "user"
             reason = flag.get("reason", "No reason provided")
             timestamp = flag.get("timestamp")
 
@@ -183,11 +280,7 @@ def get_all_flagged_answers():
                 })
             else:
                 user_id = flag.get("user_id")
-                if user_id:
-                    user = users_collection.find_one({"_id": ObjectId(user_id)})
-                    email = user.get("email", "unknown") if user else "unknown"
-                else:
-                    email = "unknown"
+                email = emails.get(user_id, "unknown")
 
                 enriched_flags.append({
                     "user_id": user_id,
@@ -197,11 +290,6 @@ def get_all_flagged_answers():
                     "timestamp": timestamp
                 })
 
-        results.append({
-            "answer_id": answer_id,
-            "content": content,
-            "status": answer.get("status", "unknown"),
-            "flags": enriched_flags
-        })
+        results.append({**FLAGGED_ANSWER.convert(answer), "flags": enriched_flags})
 
-    return results
\ No newline at end of file
+    return {"success": True, "count": len(results), "data": results, "next_cursor": next_cursor}
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# database.py needs a URI at import time; nothing here connects to it
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,104 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from utils import auth
+from utils.auth import LookupCache, TokenCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_token_cache_hits_until_exp():
+    cache = TokenCache(max_entries=10)
+
+    async def scenario():
+        await cache.put("t", {"user_id": "u", "exp": time.time() + 60})
+        first = await cache.get("t")
+        first["user_id"] = "changed"  # callers get a copy
+        await cache.put("expired", {"user_id": "u", "exp": time.time() - 1})
+        await cache.put("no-exp", {"user_id": "u"})
+        return await cache.get("t"), await cache.get("expired"), await cache.get("no-exp")
+
+    assert run(scenario()) == ({"user_id": "u", "exp": pytest.approx(time.time() + 60, abs=5)}, None, None)
+    assert cache.hits == 2 and cache.misses == 2
+
+
+def test_lookup_cache_caches_none_and_invalidates():
+    calls = []
+    statuses = {"u1": "active"}
+
+    async def load(user_id):
+        calls.append(user_id)
+        return statuses.get(user_id)
+
+    cache = LookupCache("test", load, ttl=30, max_entries=10)
+
+    async def scenario():
+        results = [await cache.get("u1"), await cache.get("u1"), await cache.get("gone"), await cache.get("gone")]
+        statuses["u1"] = "banned"
+        await cache.invalidate("u1")
+        results.append(await cache.get("u1"))
+        return results
+
+    assert run(scenario()) == ["active", "active", None, None, "banned"]
+    assert calls == ["u1", "gone", "u1"]
+
+
+def test_lookup_cache_ignores_loads_that_raced_an_invalidation():
+    cache = None
+
+    async def load(user_id):
+        await cache.invalidate(user_id)  # an admin change lands mid-load
+        return "active"
+
+    cache = LookupCache("test", load, ttl=30, max_entries=10)
+    run(cache.get("u1"))
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_get_current_user_rejects_blocked_and_deleted_users(monkeypatch):
+    statuses = {"u1": "active", "u2": "banned"}
+
+    async def load(user_id):
+        return statuses.get(user_id)
+
+    monkeypatch.setattr(auth, "user_status_cache", LookupCache("user_status", load, 30, 10))
+
+    async def status_of(user_id):
+        try:
+            await auth.get_current_user(auth.create_access_token({"user_id": user_id}))
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    async def scenario():
+        return [await status_of("u1"), await status_of("u2"), await status_of("u3")]
+
+    assert run(scenario()) == [200, 403, 401]
+
+
+def test_authenticate_rejects_revoked_sessions(monkeypatch):
+    sessions = {"s1": True, "s2": False}
+
+    async def load_status(user_id):
+        return "active"
+
+    async def load_session(session_id):
+        return sessions[session_id]
+
+    monkeypatch.setattr(auth, "user_status_cache", LookupCache("user_status", load_status, 30, 10))
+    monkeypatch.setattr(auth, "session_cache", LookupCache("session", load_session, 30, 10))
+
+    async def status_of(sid):
+        try:
+            await auth.authenticate(auth.create_access_token({"user_id": "u1", "sid": sid}))
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    async def scenario():
+        return [await status_of("s1"), await status_of("s2")]
+
+    assert run(scenario()) == [200, 401]
@@ -0,0 +1,57 @@
+import base64
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+def raw_cursor(text: str):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    values = [datetime(2024, 5, 1, 12, 30), ObjectId()]
+    decoded = decode_cursor(encode_cursor(values), SORT)
+    assert decoded[1] == values[1]
+    assert decoded[0].replace(tzinfo=None) == values[0]
+
+
+def test_none_and_typed_values():
+    sort = [("is_accepted", -1), ("score", -1), ("_id", -1)]
+    values = [True, 3, ObjectId()]
+    assert decode_cursor(encode_cursor(values), sort) == values
+    assert decode_cursor(encode_cursor([None, None, values[2]]), sort) == [None, None, values[2]]
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!not base64",
+    raw_cursor("not json"),
+    raw_cursor('{"a": 1}'),
+    raw_cursor('[{"$oid": "zz"}]'),
+    raw_cursor('[{"$date": "nope"}, {"$oid": "65a000000000000000000001"}]'),
+    raw_cursor('[{"$gt": ""}, {"$oid": "65a000000000000000000001"}]'),
+    raw_cursor('[{"$regex": "(a+)+$"}, {"$oid": "65a000000000000000000001"}]'),
+    raw_cursor('["2024-01-01", {"$oid": "65a000000000000000000001"}]'),
+    raw_cursor('[{"$date": 0}]'),
+])
+def test_rejects_malformed_and_injected_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, SORT)
+    assert error.value.status_code == 400
+
+
+def test_int_fields_refuse_bools_and_strings():
+    sort = [("score", -1), ("_id", -1)]
+    for value in (True, "3", 1.5):
+        with pytest.raises(HTTPException):
+            decode_cursor(encode_cursor([value, ObjectId()]), sort)
+
+
+def test_keyset_filter():
+    oid = ObjectId()
+    assert keyset_filter([("score", -1), ("_id", 1)], [5, oid]) == {
+        "$or": [{"score": {"$lt": 5}}, {"score": 5, "_id": {"$gt": oid}}]
+    }
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from middleware import rate_limit
+from middleware.rate_limit import SlidingWindowLimiter
+from utils.kv import MemoryKV
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(600.0)  # start of a window
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_allows_up_to_limit_then_rejects(clock):
+    limiter = SlidingWindowLimiter(MemoryKV(), limit=5, window=60)
+
+    async def scenario():
+        allowed = [await limiter.hit("a") for _ in range(5)]
+        rejected = await limiter.hit("a")
+        other = await limiter.hit("b")
+        return allowed, rejected, other
+
+    allowed, rejected, other = run(scenario())
+    assert allowed == [0] * 5
+    assert rejected > 0
+    assert other == 0
+
+
+def test_rejected_requests_are_not_counted(clock):
+    backend = MemoryKV()
+    limiter = SlidingWindowLimiter(backend, limit=5, window=60, name="rl")
+
+    async def scenario():
+        for _ in range(50):
+            await limiter.hit("a")
+        return await backend.get("rl:a:10")
+
+    assert run(scenario()) == 5
+
+
+def test_retry_after_is_honest_and_bounded(clock):
+    limiter = SlidingWindowLimiter(MemoryKV(), limit=10, window=60)
+
+    async def scenario():
+        for _ in range(10):
+            await limiter.hit("a")
+        clock.now += 30
+        waits = [await limiter.hit("a") for _ in range(20)]
+        clock.now += waits[-1]
+        return waits, await limiter.hit("a")
+
+    waits, after_wait = run(scenario())
+    assert all(0 < wait <= 2 * 60 for wait in waits)
+    # Hammering doesn't push Retry-After further out
+    assert len(set(waits)) == 1
+    assert after_wait == 0
+
+
+def test_steady_overload_gets_about_the_limit(clock):
+    # 6 req/s against 300/60 for 10 minutes: about 300 per minute get through
+    limiter = SlidingWindowLimiter(MemoryKV(), limit=300, window=60)
+
+    async def scenario():
+        allowed = 0
+        for _ in range(3600):
+            allowed += await limiter.hit("a") == 0
+            clock.now += 1 / 6
+        return allowed
+
+    allowed = run(scenario())
+    assert 2900 <= allowed <= 3000 + 300
+
+
+def test_sliding_estimate_uses_previous_window(clock):
+    limiter = SlidingWindowLimiter(MemoryKV(), limit=10, window=60)
+
+    async def scenario():
+        for _ in range(10):
+            await limiter.hit("a")
+        clock.now += 60  # next window, previous still fully weighted
+        blocked = await limiter.hit("a")
+        clock.now += 30  # half of the previous window slid out: room for 5
+        allowed = [await limiter.hit("a") for _ in range(6)]
+        return blocked, allowed
+
+    blocked, allowed = run(scenario())
+    assert blocked > 0
+    assert allowed == [0] * 5 + [allowed[-1]] and allowed[-1] > 0
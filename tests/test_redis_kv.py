@@ -0,0 +1,198 @@
+import asyncio
+import pytest
+from utils.kv import RedisKV, RedisError
+
+
+# Just enough of a Redis server for RedisKV: RESP arrays in, RESP replies out
+class StandInRedis:
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.connections = 0
+        self.commands = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        authed = self.password is None
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+            name = args[0].decode().upper()
+            self.commands.append(name)
+            if name == "AUTH":
+                authed = args[1].decode() == self.password
+                reply = b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n"
+            elif not authed:
+                reply = b"-NOAUTH Authentication required\r\n"
+            else:
+                reply = self._run(name, args[1:])
+            writer.write(reply)
+            await writer.drain()
+        writer.close()
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _run(self, name, args):
+        data = self.data
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "SELECT":
+            return b"+OK\r\n"
+        if name == "GET":
+            value = data.get(args[0])
+            if isinstance(value, set):
+                return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+            return self._bulk(value)
+        if name == "MGET":
+            return b"*%d\r\n" % len(args) + b"".join(
+                self._bulk(data.get(key) if not isinstance(data.get(key), set) else None) for key in args
+            )
+        if name == "SET":
+            options = [arg.upper() for arg in args[2:]]
+            if b"NX" in options and args[0] in data:
+                return b"$-1\r\n"
+            data[args[0]] = args[1]
+            return b"+OK\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(data.pop(key, None) is not None for key in args)
+        if name == "INCRBY":
+            try:
+                value = int(data.get(args[0], b"0")) + int(args[1])
+            except ValueError:
+                return b"-ERR value is not an integer or out of range\r\n"
+            data[args[0]] = str(value).encode()
+            return b":%d\r\n" % value
+        if name == "SADD":
+            members = data.setdefault(args[0], set())
+            if not isinstance(members, set):
+                return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+            before = len(members)
+            members.update(args[1:])
+            return b":%d\r\n" % (len(members) - before)
+        if name == "SMEMBERS":
+            members = data.get(args[0], set())
+            return b"*%d\r\n" % len(members) + b"".join(self._bulk(m) for m in members)
+        if name == "PEXPIRE":
+            return b":%d\r\n" % (args[0] in data)
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+
+def run_with_server(scenario, password=None):
+    async def main():
+        server = StandInRedis(password)
+        await server.start()
+        try:
+            return server, await scenario(server)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_get_set_incr_and_sets():
+    async def scenario(server):
+        kv = RedisKV(f"redis://127.0.0.1:{server.port}/0")
+        try:
+            assert await kv.get("missing") is None
+            assert await kv.set("k", b"v", ttl=5) is True
+            assert await kv.set("k", b"other", ttl=5, nx=True) is False
+            assert await kv.get("k") == b"v"
+            assert await kv.mget("k", "missing") == [b"v", None]
+            assert await kv.incr("n", 2, ttl=10) == 2
+            assert await kv.incr("n", -1) == 1
+            await kv.sadd("s", "a", "b", ttl=10)
+            await kv.sadd("s", "b", "c")
+            assert await kv.smembers("s") == {"a", "b", "c"}
+            await kv.expire(["k", "s"], 10)
+            await kv.delete("k", "s")
+            assert await kv.get("k") is None and await kv.smembers("s") == set()
+            assert await kv.ping()
+        finally:
+            await kv.close()
+
+    server, _ = run_with_server(scenario)
+    # All of it over one pooled connection
+    assert server.connections == 1
+
+
+def test_error_reply_raises_and_keeps_the_connection():
+    async def scenario(server):
+        kv = RedisKV(f"redis://127.0.0.1:{server.port}")
+        try:
+            await kv.set("k", b"not a number")
+            with pytest.raises(RedisError, match="not an integer"):
+                await kv.incr("k")
+            with pytest.raises(RedisError, match="unknown command"):
+                await kv.execute("BOGUS")
+            await kv.set("s", b"x")
+            with pytest.raises(RedisError, match="WRONGTYPE"):
+                await kv.sadd("s", "a")
+            # The stream stayed in sync and the connection went back to the pool
+            assert len(kv._idle) == 1
+            assert await kv.get("k") == b"not a number"
+            return kv.snapshot()
+        finally:
+            await kv.close()
+
+    server, snapshot = run_with_server(scenario)
+    assert server.connections == 1
+    assert snapshot["errors"] == 0
+
+
+def test_pool_reuses_and_bounds_connections():
+    async def scenario(server):
+        kv = RedisKV(f"redis://127.0.0.1:{server.port}", pool_size=3)
+        try:
+            results = await asyncio.gather(*(kv.incr("n") for _ in range(50)))
+            assert sorted(results) == list(range(1, 51))
+            return len(kv._idle)
+        finally:
+            await kv.close()
+
+    server, idle = run_with_server(scenario)
+    assert server.connections <= 3
+    assert idle == server.connections
+
+
+def test_auth():
+    async def ok(server):
+        kv = RedisKV(f"redis://:secret@127.0.0.1:{server.port}/2")
+        try:
+            await kv.set("k", b"v")
+            return await kv.get("k")
+        finally:
+            await kv.close()
+
+    server, value = run_with_server(ok, password="secret")
+    assert value == b"v"
+    assert server.commands[:2] == ["AUTH", "SELECT"]
+
+    async def wrong(server):
+        kv = RedisKV(f"redis://:nope@127.0.0.1:{server.port}")
+        with pytest.raises(RedisError, match="WRONGPASS"):
+            await kv.get("k")
+        return len(kv._idle)
+
+    _, idle = run_with_server(wrong, password="secret")
+    assert idle == 0
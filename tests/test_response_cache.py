@@ -0,0 +1,115 @@
+import asyncio
+from utils.kv import MemoryKV
+from utils.response_cache import ResponseCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_hit_then_invalidated_by_tag():
+    cache = ResponseCache(MemoryKV())
+
+    async def scenario():
+        etag = await cache.set("page", b'{"a":1}', ["question:1", "questions:list"])
+        hit = await cache.get("page")
+        await cache.invalidate("question:1")
+        return etag, hit, await cache.get("page")
+
+    etag, hit, after = run(scenario())
+    assert hit == (b'{"a":1}', etag)
+    assert after is None
+
+
+def test_entries_stored_after_invalidation_are_served():
+    cache = ResponseCache(MemoryKV())
+
+    async def scenario():
+        await cache.set("page", b"old", ["question:1"])
+        await cache.invalidate("question:1")
+        await cache.set("page", b"new", ["question:1"])
+        return await cache.get("page")
+
+    assert run(scenario())[0] == b"new"
+
+
+def test_clear_drops_everything():
+    cache = ResponseCache(MemoryKV())
+
+    async def scenario():
+        await cache.set("a", b"1", ["x"])
+        await cache.set("b", b"2")
+        await cache.clear()
+        return await cache.get("a"), await cache.get("b")
+
+    assert run(scenario()) == (None, None)
+
+
+def test_key_count_does_not_grow_with_distinct_keys():
+    backend = MemoryKV()
+    cache = ResponseCache(backend)
+
+    async def scenario():
+        for i in range(5000):
+            await cache.set(f"questions:newest:{i}", b"[]", ["questions:list", "questions:list:newest"])
+
+    run(scenario())
+    # One key per entry plus one version per tag, no per-key tag membership
+    assert len(backend._data) == 5000 + 3
+    assert max(len(value) for _, value in backend._data.values()) < 200
+
+
+def test_lost_version_is_a_miss_not_a_stale_hit():
+    # A tiny LRU where a hot entry is read often and other entries churn
+    backend = MemoryKV(max_entries=6)
+    cache = ResponseCache(backend)
+
+    async def scenario():
+        await cache.set("hot", b"v1", ["question:1"])
+        for i in range(20):
+            await cache.get("hot")
+            await cache.set(f"cold:{i}", b"x", [f"question:{100 + i}"])
+        await cache.invalidate("question:1")
+        stale = await cache.get("hot")
+        backend._data.pop("rc:v:question:1", None)
+        await cache.set("hot", b"v2", ["question:1"])
+        backend._data.pop("rc:v:question:1")  # evicted
+        return stale, await cache.get("hot")
+
+    assert run(scenario()) == (None, None)
+
+
+def test_invalidation_during_the_read_is_not_cached():
+    cache = ResponseCache(MemoryKV())
+
+    async def scenario():
+        await cache.set("q:1", b"old", ["question:1"])
+        await cache.invalidate("question:1")
+        # A reader misses and takes versions, then reads the old document;
+        # the writer updates and invalidates before the reader stores it
+        versions = await cache.versions(["question:1"])
+        await cache.invalidate("question:1")
+        await cache.set("q:1", b"old", ["question:1"], versions)
+        return await cache.get("q:1")
+
+    assert run(scenario()) is None
+
+
+def test_tags_found_by_the_read_are_checked_against_the_epoch():
+    cache = ResponseCache(MemoryKV())
+
+    async def scenario():
+        versions = await cache.versions(["questions:list"])
+        await cache.invalidate("question:7")  # a question on the page changed mid-read
+        await cache.set("page", b"stale", ["questions:list", "question:7"], versions)
+        skipped = await cache.get("page")
+
+        versions = await cache.versions(["questions:list"])
+        await cache.set("page", b"fresh", ["questions:list", "question:7"], versions)
+        stored = await cache.get("page")
+        await cache.invalidate("question:7")
+        return skipped, stored, await cache.get("page")
+
+    skipped, stored, after = run(scenario())
+    assert skipped is None and stored[0] == b"fresh" and after is None
+    assert cache.stats["skipped_sets"] == 1
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from repository import session as session_repo
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# Just the slice of a Motor collection the session repository uses
+class FakeSessions:
+    def __init__(self):
+        self.docs = {}
+
+    def _matches(self, doc, query):
+        for key, cond in query.items():
+            if isinstance(cond, dict):
+                if not doc.get(key) > cond["$gt"]:
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def find_one_and_update(self, query, update, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None or not self._matches(doc, query):
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def delete_one(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and self._matches(doc, query):
+            del self.docs[query["_id"]]
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    fake = FakeSessions()
+    monkeypatch.setattr(session_repo, "_sessions", lambda: fake)
+    return fake
+
+
+def test_rotate_issues_a_new_single_use_token(sessions):
+    async def scenario():
+        session_id, token = await session_repo.create("u1", "u1@example.com")
+        session, new_token = await session_repo.rotate(token)
+        return session_id, session, new_token, await session_repo.rotate(new_token)
+
+    session_id, session, new_token, again = run(scenario())
+    assert session["user_id"] == "u1"
+    assert new_token.startswith(f"{session_id}.")
+    assert again is not None and session_id in sessions.docs
+
+
+def test_replaying_a_retired_token_revokes_the_session(sessions):
+    async def scenario():
+        session_id, token = await session_repo.create("u1", "u1@example.com")
+        await session_repo.rotate(token)
+        return session_id, await session_repo.rotate(token)
+
+    session_id, replayed = run(scenario())
+    assert replayed is None
+    assert session_id not in sessions.docs
+
+
+def test_a_guessed_secret_does_not_revoke_the_session(sessions):
+    async def scenario():
+        session_id, token = await session_repo.create("u1", "u1@example.com")
+        await session_repo.rotate(token)
+        return session_id, await session_repo.rotate(f"{session_id}.x")
+
+    session_id, guessed = run(scenario())
+    assert guessed is None
+    assert session_id in sessions.docs
+
+
+def test_rotate_rejects_expired_sessions(sessions):
+    async def scenario():
+        session_id, token = await session_repo.create("u1", "u1@example.com")
+        sessions.docs[session_id]["expires_at"] = datetime.utcnow() - timedelta(seconds=1)
+        return await session_repo.rotate(token)
+
+    assert run(scenario()) is None
@@ -0,0 +1,122 @@
+import asyncio
+from pymongo.errors import AutoReconnect, BulkWriteError
+from utils.write_buffer import WriteBehindBuffer
+
+
+# Applies $inc ops to a dict, failing the ops whose _id is in `bad`
+class FakeCollection:
+    def __init__(self, bad=(), error=None):
+        self.docs = {}
+        self.bad = set(bad)
+        self.error = error
+
+    async def bulk_write(self, ops, ordered=True):
+        if self.error:
+            raise self.error
+        errors = []
+        for index, op in enumerate(ops):
+            key, inc = op._filter["_id"], op._doc["$inc"]
+            if key in self.bad:
+                errors.append({"index": index, "code": 14, "errmsg": "Cannot apply $inc"})
+                continue
+            doc = self.docs.setdefault(key, {})
+            for field, value in inc.items():
+                doc[field] = doc.get(field, 0) + value
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": 0})
+
+
+def make_buffer(collection, flushed):
+    async def on_flush(keys):
+        flushed.extend(keys)
+
+    # Long interval: the tests flush explicitly
+    return WriteBehindBuffer(lambda: collection, interval=60, on_flush=on_flush)
+
+
+def test_partial_bulk_failure_requeues_only_failed_ops():
+    collection = FakeCollection(bad={"b"})
+    flushed = []
+    buffer = make_buffer(collection, flushed)
+
+    async def scenario():
+        buffer.start()
+        for key in ("a", "b", "c"):
+            await buffer.add(key, {"score": 1})
+        await buffer.flush()
+        await buffer.flush()
+        pending = dict(buffer._pending)
+        await buffer.stop()
+        return pending
+
+    pending = asyncio.run(scenario())
+    # Retried flushes don't re-apply the ops that went through
+    assert collection.docs == {"a": {"score": 1}, "c": {"score": 1}}
+    assert pending == {"b": {"score": 1}}
+    assert sorted(flushed) == ["a", "c"]
+
+
+def test_whole_batch_failure_requeues_everything():
+    collection = FakeCollection(error=AutoReconnect("connection reset"))
+    buffer = make_buffer(collection, [])
+
+    async def scenario():
+        buffer.start()
+        await buffer.add("a", {"score": 1})
+        await buffer.add("b", {"score": 2})
+        await buffer.flush()
+        collection.error = None
+        await buffer.add("a", {"score": 1})
+        await buffer.flush()
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert collection.docs == {"a": {"score": 2}, "b": {"score": 2}}
+    assert buffer._pending == {}
+
+
+def test_on_flush_errors_do_not_stop_the_buffer():
+    collection = FakeCollection()
+    calls = []
+
+    async def on_flush(keys):
+        calls.append(sorted(keys))
+        if len(calls) == 1:
+            raise RuntimeError("kv down")
+
+    buffer = WriteBehindBuffer(lambda: collection, interval=0.01, max_keys=1, on_flush=on_flush)
+
+    async def scenario():
+        buffer.start()
+        await buffer.add("a", {"score": 1})
+        # Past max_keys: waits for the background flush, whose on_flush raises
+        await asyncio.wait_for(buffer.add("b", {"score": 1}), timeout=1)
+        await asyncio.wait_for(buffer.add("c", {"score": 1}), timeout=1)
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert collection.docs == {"a": {"score": 1}, "b": {"score": 1}, "c": {"score": 1}}
+    assert calls == [["a"], ["b"], ["c"]]
+    assert buffer.stats["flush_errors"] == 1
+
+
+def test_ops_that_keep_failing_are_dropped_after_max_retries():
+    collection = FakeCollection(bad={"b"})
+    buffer = WriteBehindBuffer(lambda: collection, interval=60, max_retries=2)
+
+    async def scenario():
+        buffer.start()
+        await buffer.add("a", {"score": 1})
+        await buffer.add("b", {"score": 1})
+        pending = []
+        for _ in range(3):
+            await buffer.flush()
+            pending.append(dict(buffer._pending))
+        await buffer.stop()
+        return pending
+
+    pending = asyncio.run(scenario())
+    assert pending == [{"b": {"score": 1}}, {"b": {"score": 1}}, {}]
+    assert collection.docs == {"a": {"score": 1}}
+    assert buffer.stats["dropped_ops"] == 1
+    assert buffer._failures == {}
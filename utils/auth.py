@@ -1,15 +1,33 @@
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
+import hashlib
 import os 
+import time
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
+from utils.kv import MemoryKV
+from utils.metrics import register_collector
+from repository import user as user_repo
+from repository import session as session_repo
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGO", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Verified tokens kept in memory (0 disables the cache)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# How long a user's status is trusted before it is read again (0 disables
+# the cache). An admin's change applies at once in the worker that made it
+# and within this many seconds in the others.
+USER_STATUS_TTL = float(os.getenv("USER_STATUS_TTL", "30"))
+USER_STATUS_CACHE_SIZE = int(os.getenv("USER_STATUS_CACHE_SIZE", "10000"))
+# Same for sessions: a revoked refresh session stops its access tokens at
+# once in this worker and within SESSION_CACHE_TTL seconds in the others
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
+# Statuses set by PATCH /admin/users/{user_id}/status that lock a user out
+BLOCKED_STATUSES = {"banned", "suspended"}
 
 # This enables Swagger UI's lock 🔒
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -23,7 +41,7 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def decode_access_token(token: str):
+def _verify(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -31,17 +49,164 @@ def decode_access_token(token: str):
         return None
 
 
-# ✅ This is required to lock routes using Depends()
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    user_data = decode_access_token(token)
-    if not user_data:
+# Claims of already verified tokens, keyed by a hash of the token so the
+# tokens themselves are not kept, and dropped at the token's exp. Only
+# valid tokens with an exp are cached, so a flood of bad tokens can't evict
+# real ones. Always an in-process MemoryKV, whatever CACHE_URL says: it is
+# read on every request, where a network round trip would cost more than
+# the verification it saves.
+class TokenCache:
+    def __init__(self, max_entries: int = JWT_CACHE_SIZE):
+        self.backend = MemoryKV(max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def get(self, token: str):
+        claims = await self.backend.get(self._key(token))
+        if claims is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(claims)
+
+    async def put(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= time.time():
+            return
+        await self.backend.set(self._key(token), dict(claims), ttl=exp - time.time())
+
+    def snapshot(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.backend._data),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def exposition_lines(self):
+        stats = self.snapshot()
+        return [
+            "# HELP jwt_cache_lookups_total Access token lookups in the verified-token cache.",
+            "# TYPE jwt_cache_lookups_total counter",
+            f'jwt_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+            f'jwt_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+            "# HELP jwt_cache_entries Verified tokens held in memory.",
+            "# TYPE jwt_cache_entries gauge",
+            f"jwt_cache_entries {stats['entries']}",
+        ]
+
+
+token_cache = TokenCache()
+register_collector(token_cache.exposition_lines)
+
+
+async def decode_access_token(token: str):
+    payload = await token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = _verify(token)
+    if payload is not None:
+        await token_cache.put(token, payload)
+    return payload
+
+
+# Results of an async `load(key)` for recently seen keys (user statuses,
+# sessions), kept `ttl` seconds in an in-process MemoryKV (same reasoning
+# as TokenCache). invalidate() bumps a version so a load already in flight
+# can't put the old value back. Sync handlers call it through
+# anyio.from_thread so the cache is only ever touched from the event loop.
+class LookupCache:
+    def __init__(self, name: str, load, ttl: float, max_entries: int):
+        self.name = name
+        self.load = load
+        self.ttl = ttl
+        self.backend = MemoryKV(max_entries)
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str):
+        # Values are wrapped so a cached None (e.g. no such user) is a hit
+        entry = await self.backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        version = self._version
+
+        value = await self.load(key)
+
+        if self.ttl and version == self._version:
+            await self.backend.set(key, (value,), ttl=self.ttl)
+        return value
+
+    async def invalidate(self, key: str):
+        self._version += 1
+        await self.backend.delete(key)
+
+    def snapshot(self):
+        return {"entries": len(self.backend._data), "hits": self.hits, "misses": self.misses}
+
+    def exposition_lines(self):
+        stats = self.snapshot()
+        name = f"{self.name}_cache_lookups_total"
+        return [
+            f"# HELP {name} Lookups by the auth dependency in the {self.name} cache.",
+            f"# TYPE {name} counter",
+            f'{name}{{result="hit"}} {stats["hits"]}',
+            f'{name}{{result="miss"}} {stats["misses"]}',
+        ]
+
+
+# user_id -> status, None when the user no longer exists
+user_status_cache = LookupCache("user_status", user_repo.get_status, USER_STATUS_TTL, USER_STATUS_CACHE_SIZE)
+register_collector(user_status_cache.exposition_lines)
+# session id -> whether it is still live
+session_cache = LookupCache("session", session_repo.is_active, SESSION_CACHE_TTL, USER_STATUS_CACHE_SIZE)
+register_collector(session_cache.exposition_lines)
+
+
+def is_active(user_status):
+    return user_status is not None and user_status not in BLOCKED_STATUSES
+
+
+# The one auth check, for HTTP and WebSocket alike: a valid token whose
+# user still exists and is not banned or suspended, and whose refresh
+# session (sid, when the token came with one) wasn't revoked. Returns the
+# token claims (user_id, email), raises HTTPException otherwise.
+async def authenticate(token: str):
+    user_data = await decode_access_token(token)
+    if (
+        not user_data
+        or not user_data.get("user_id")
+        or (user_data.get("sid") and not await session_cache.get(user_data["sid"]))
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_status = await user_status_cache.get(user_data["user_id"])
+    if user_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if user_status in BLOCKED_STATUSES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Account {user_status}")
     return user_data
 
 
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await authenticate(token)
+
+
 # Optional export alias
 token = create_access_token
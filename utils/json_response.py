@@ -0,0 +1,46 @@
+import json
+from datetime import date, datetime
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+
+# Types Mongo documents carry that JSON has no native form for
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, bytes):
+        try:
+            return obj.decode("utf-8")
+        except UnicodeDecodeError:
+            return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Encode a payload straight from Mongo documents in one pass: ObjectId as
+# its hex string, datetime as ISO 8601, bytes as UTF-8 text
+if orjson is not None:
+    def dumps(content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(content) -> bytes:
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+# Only a FastJSONResponse built by the endpoint itself gets the single pass.
+# As default_response_class it replaces just the final render: a plain dict
+# or list returned from an endpoint still goes through FastAPI's
+# jsonable_encoder first, which walks the whole payload again and rejects
+# ObjectId. Endpoints that return Mongo documents or large lists therefore
+# return FastJSONResponse(...) directly.
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
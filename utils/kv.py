@@ -0,0 +1,319 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# memory:// (default, per process) or redis://[:password@]host[:port][/db]
+# to share state between uvicorn workers
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+KV_MAX_ENTRIES = int(os.getenv("KV_MAX_ENTRIES", "100000"))
+KV_POOL_SIZE = int(os.getenv("KV_POOL_SIZE", "10"))
+
+
+# Small async key/value interface the caches and the rate limiter share.
+# Values are bytes, keys and set members are str, ttl is in seconds.
+class KVBackend:
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def mget(self, *keys: str):
+        raise NotImplementedError
+
+    # With nx=True only sets a missing key; returns whether it was set
+    async def set(self, key: str, value: bytes, ttl: float = None, nx: bool = False):
+        raise NotImplementedError
+
+    # (Re)set the ttl of the keys that exist
+    async def expire(self, keys, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    # Add `amount` and return the new value; `ttl` is applied when the key is created
+    async def incr(self, key: str, amount: int = 1, ttl: float = None):
+        raise NotImplementedError
+
+    # Add members to a set and (re)set its ttl
+    async def sadd(self, key: str, *members: str, ttl: float = None):
+        raise NotImplementedError
+
+    async def smembers(self, key: str):
+        raise NotImplementedError
+
+    async def ping(self):
+        return True
+
+    async def close(self):
+        pass
+
+    def snapshot(self):
+        return {}
+
+
+# In-process backend: an LRU of at most `max_entries` keys with per-key expiry
+class MemoryKV(KVBackend):
+    def __init__(self, max_entries: int = KV_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key: (expires_at or None, value)
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _put(self, key, value, expires_at):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _expiry(ttl):
+        return time.monotonic() + ttl if ttl else None
+
+    async def get(self, key):
+        entry = self._get(key)
+        return entry[1] if entry else None
+
+    async def mget(self, *keys):
+        return [entry[1] if entry else None for entry in map(self._get, keys)]
+
+    async def set(self, key, value, ttl=None, nx=False):
+        if nx and self._get(key) is not None:
+            return False
+        self._put(key, value, self._expiry(ttl))
+        return True
+
+    async def expire(self, keys, ttl):
+        for key in keys:
+            entry = self._get(key)
+            if entry is not None:
+                self._data[key] = (self._expiry(ttl), entry[1])
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key, amount=1, ttl=None):
+        entry = self._get(key)
+        if entry is None:
+            value, expires_at = amount, self._expiry(ttl)
+        else:
+            value, expires_at = entry[1] + amount, entry[0]
+        self._put(key, value, expires_at)
+        return value
+
+    async def sadd(self, key, *members, ttl=None):
+        entry = self._get(key)
+        members_set = entry[1] if entry else set()
+        members_set.update(members)
+        self._put(key, members_set, self._expiry(ttl))
+
+    async def smembers(self, key):
+        entry = self._get(key)
+        return set(entry[1]) if entry else set()
+
+    def snapshot(self):
+        return {
+            "backend": "memory",
+            "keys": len(self._data),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisError(Exception):
+    pass
+
+
+# One RESP connection; commands are pipelined and replies read in order
+class _RedisConnection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    def _encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode("ascii")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    async def _read_reply(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            if size == -1:
+                return None
+            data = await self.reader.readexactly(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(payload)
+            if size == -1:
+                return None
+            return [await self._read_reply() for _ in range(size)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    async def pipeline(self, commands):
+        self.writer.write(b"".join(self._encode(args) for args in commands))
+        await self.writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    def close(self):
+        self.writer.close()
+
+
+# Redis-protocol backend with a small connection pool, no client library needed
+class RedisKV(KVBackend):
+    def __init__(self, url: str, pool_size: int = KV_POOL_SIZE):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self._idle = []
+        self._slots = None
+        self.errors = 0
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = _RedisConnection(reader, writer)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            for reply in await conn.pipeline(setup):
+                if isinstance(reply, RedisError):
+                    conn.close()
+                    raise reply
+        return conn
+
+    async def pipeline(self, commands):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            try:
+                replies = await conn.pipeline(commands)
+            except BaseException:
+                # Includes cancellation mid-reply: the stream is out of sync
+                self.errors += 1
+                conn.close()
+                raise
+            self._idle.append(conn)
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    async def execute(self, *args):
+        return (await self.pipeline([args]))[0]
+
+    async def get(self, key):
+        return await self.execute("GET", key)
+
+    async def mget(self, *keys):
+        return await self.execute("MGET", *keys) if keys else []
+
+    async def set(self, key, value, ttl=None, nx=False):
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        if nx:
+            args.append("NX")
+        return await self.execute(*args) is not None
+
+    async def expire(self, keys, ttl):
+        commands = [("PEXPIRE", key, int(ttl * 1000)) for key in keys]
+        if commands:
+            await self.pipeline(commands)
+
+    async def delete(self, *keys):
+        if keys:
+            await self.execute("DEL", *keys)
+
+    async def incr(self, key, amount=1, ttl=None):
+        if not ttl:
+            return await self.execute("INCRBY", key, amount)
+        # Create with the ttl if missing, then increment, in one round trip
+        _, value = await self.pipeline([
+            ("SET", key, 0, "PX", int(ttl * 1000), "NX"),
+            ("INCRBY", key, amount),
+        ])
+        return value
+
+    async def sadd(self, key, *members, ttl=None):
+        commands = [("SADD", key, *members)]
+        if ttl:
+            commands.append(("PEXPIRE", key, int(ttl * 1000)))
+        await self.pipeline(commands)
+
+    async def smembers(self, key):
+        return {member.decode("utf-8") for member in await self.execute("SMEMBERS", key)}
+
+    async def ping(self):
+        return await self.execute("PING") == "PONG"
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+    def snapshot(self):
+        return {
+            "backend": "redis",
+            "host": self.host,
+            "port": self.port,
+            "db": self.db,
+            "idle_connections": len(self._idle),
+            "errors": self.errors,
+        }
+
+
+_backends = []
+
+
+# Each consumer gets its own backend so that, in memory mode, one cannot
+# evict the other's keys; `max_entries` only applies to memory://
+def create_backend(url: str = CACHE_URL, max_entries: int = KV_MAX_ENTRIES):
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        backend = MemoryKV(max_entries)
+    elif scheme == "redis":
+        backend = RedisKV(url)
+    else:
+        raise ValueError(f"Unsupported CACHE_URL scheme: {scheme}")
+    _backends.append(backend)
+    return backend
+
+
+async def close_all():
+    for backend in _backends:
+        await backend.close()
@@ -0,0 +1,120 @@
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)  # bytes
+
+
+# Cumulative-on-read histogram: observe() bumps a single bucket
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # [(upper bound, cumulative count)], ending with +Inf
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _escape(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def histogram_lines(name: str, labels: str, histogram: Histogram):
+    lines = [
+        f'{name}_bucket{{{labels},le="{_number(bound)}"}} {count}'
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{{{labels}}} {_number(histogram.sum)}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+# Latency and response size per (method, route template, status). Keys are
+# bounded by the app's routes; unmatched paths share one route label.
+class RequestMetrics:
+    def __init__(self):
+        self.series = {}  # key: (label string, latency histogram, size histogram)
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route, status)
+        series = self.series.get(key)
+        if series is None:
+            labels = f'method="{_escape(method)}",route="{_escape(route)}",status="{status}"'
+            series = self.series[key] = (labels, Histogram(LATENCY_BUCKETS), Histogram(SIZE_BUCKETS))
+        series[1].observe(seconds)
+        series[2].observe(size)
+
+    def _histogram_lines(self, name: str, index: int):
+        lines = []
+        for labels, *histograms in self.series.values():
+            lines += histogram_lines(name, labels, histograms[index])
+        return lines
+
+    def exposition_lines(self):
+        lines = [
+            "# HELP http_requests_total HTTP requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for labels, latency, _ in self.series.values():
+            lines.append(f"http_requests_total{{{labels}}} {latency.count}")
+        lines += [
+            "# HELP http_request_duration_seconds Time until the last response byte was sent.",
+            "# TYPE http_request_duration_seconds histogram",
+            *self._histogram_lines("http_request_duration_seconds", 0),
+            "# HELP http_response_size_bytes Response body size.",
+            "# TYPE http_response_size_bytes histogram",
+            *self._histogram_lines("http_response_size_bytes", 1),
+            "# HELP http_requests_in_flight HTTP requests being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+# Gauges read at scrape time: (name, help, function returning a number or None)
+_gauges = []
+# Functions returning ready exposition lines, for whole metric families
+_collectors = []
+
+
+def register_gauge(name: str, help_text: str, read):
+    _gauges.append((name, help_text, read))
+
+
+def register_collector(collect):
+    _collectors.append(collect)
+
+
+# Prometheus text exposition format (0.0.4)
+def render_prometheus():
+    lines = request_metrics.exposition_lines()
+    for collect in _collectors:
+        lines += collect()
+    for name, help_text, read in _gauges:
+        value = read()
+        if value is None:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import monitoring
+from utils.metrics import Histogram, histogram_lines, register_collector
+
+# Commands slower than this are captured into the slow command buffer
+MONGO_SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+MONGO_SLOW_BUFFER = int(os.getenv("MONGO_SLOW_BUFFER", "100"))
+# Also run explain (queryPlanner) on captured commands, one at a time
+MONGO_SLOW_EXPLAIN = os.getenv("MONGO_SLOW_EXPLAIN", "0") == "1"
+
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Command fields that carry user data; their literal values are redacted
+_REDACTED_FIELDS = ("filter", "query", "pipeline")
+# Structural fields kept as they are
+_KEPT_FIELDS = ("sort", "projection", "hint", "key", "limit")
+
+
+# Replace literal values with "?" but keep keys, operators and "$field" paths
+def redact(value):
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ["?"]
+        return [redact(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def command_shape(name: str, command: dict):
+    shape = {}
+    for field in _REDACTED_FIELDS:
+        if field in command:
+            shape[field] = redact(command[field])
+    for field in _KEPT_FIELDS:
+        if field in command:
+            shape[field] = command[field]
+    # update/delete carry their filters in a list of statements
+    statements = command.get("updates") or command.get("deletes")
+    if statements:
+        shape["q"] = redact(statements[0].get("q", {}))
+        shape["statements"] = len(statements)
+    return shape
+
+
+def _collection(name: str, command: dict):
+    value = command.get("collection") if name == "getMore" else command.get(name)
+    return value if isinstance(value, str) else "-"
+
+
+# Times every command per (collection, command) and keeps the slowest ones,
+# redacted, in a ring buffer. Motor runs pymongo on executor threads, so all
+# state is behind a lock.
+class CommandMonitor(monitoring.CommandListener):
+    def __init__(self, slow_ms: float = MONGO_SLOW_MS, buffer_size: int = MONGO_SLOW_BUFFER,
+                 explain: bool = MONGO_SLOW_EXPLAIN):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.slow = deque(maxlen=buffer_size)
+        self.histograms = {}
+        self.failures = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._explainer = None
+        self._explaining = False
+
+    def started(self, event):
+        with self._lock:
+            self._inflight[(event.request_id, event.connection_id)] = (event.database_name, event.command)
+
+    def _finished(self, event, failed: bool):
+        with self._lock:
+            database_name, command = self._inflight.pop((event.request_id, event.connection_id), (None, {}))
+            collection = _collection(event.command_name, command)
+            seconds = event.duration_micros / 1e6
+            key = (collection, event.command_name)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+            if failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+            if seconds * 1000 < self.slow_ms or event.command_name == "explain":
+                return
+            entry = {
+                "at": time.time(),
+                "database": database_name,
+                "collection": collection,
+                "command": event.command_name,
+                "duration_ms": round(seconds * 1000, 3),
+                "failed": failed,
+                "shape": command_shape(event.command_name, command),
+            }
+            self.slow.append(entry)
+            run_explain = (
+                self.explain and not failed and not self._explaining and event.command_name in EXPLAINABLE
+            )
+            if run_explain:
+                self._explaining = True
+        if run_explain:
+            self._explain_later(entry, database_name, command)
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    # explain on a background thread, one at a time, so it never delays the
+    # request that was slow; further slow commands skip explain meanwhile
+    def _explain_later(self, entry, database_name, command):
+        if self._explainer is None:
+            self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mongo-explain")
+        explained = {k: v for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber")}
+        self._explainer.submit(self._explain, entry, database_name, explained)
+
+    def _explain(self, entry, database_name, command):
+        import database  # the monitor is created before the client exists
+        try:
+            result = database.get_client()[database_name].command(
+                "explain", command, verbosity="queryPlanner"
+            )
+            entry["explain"] = result.get("queryPlanner", {}).get("winningPlan")
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        finally:
+            with self._lock:
+                self._explaining = False
+
+    def slow_commands(self):
+        with self._lock:
+            return list(reversed(self.slow))
+
+    def clear(self):
+        with self._lock:
+            self.slow.clear()
+
+    def exposition_lines(self):
+        with self._lock:
+            histograms = list(self.histograms.items())
+            failures = list(self.failures.items())
+        lines = [
+            "# HELP mongo_command_duration_seconds MongoDB command duration by collection and command.",
+            "# TYPE mongo_command_duration_seconds histogram",
+        ]
+        for (collection, name), histogram in histograms:
+            labels = f'collection="{collection}",command="{name}"'
+            lines += histogram_lines("mongo_command_duration_seconds", labels, histogram)
+        lines += [
+            "# HELP mongo_command_failures_total Failed MongoDB commands.",
+            "# TYPE mongo_command_failures_total counter",
+        ]
+        for (collection, name), count in failures:
+            lines.append(f'mongo_command_failures_total{{collection="{collection}",command="{name}"}} {count}')
+        return lines
+
+
+command_monitor = CommandMonitor()
+register_collector(command_monitor.exposition_lines)
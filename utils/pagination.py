@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+# Opaque cursor: the sort-key values of the last document on a page
+def encode_cursor(values: list):
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# What a cursor may hold for each sort field. Anything else (an operator
+# document like {"$gt": ""}, a regex, a string) would change the meaning
+# of the keyset filter, so it is refused. None is a missing field.
+SORT_FIELD_TYPES = {
+    "_id": lambda value: isinstance(value, ObjectId),
+    "created_at": lambda value: isinstance(value, datetime),
+    "last_activity_at": lambda value: isinstance(value, datetime),
+    "score": _is_int,
+    "answer_count": _is_int,
+    "is_accepted": lambda value: isinstance(value, bool),
+}
+
+
+# Cursor values for `sort`, or 400 for anything that isn't a cursor we issued
+def decode_cursor(cursor: str, sort: list):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw)
+    except Exception:
+        # binascii/JSON errors, but also InvalidId, IndexError... from
+        # malformed extended JSON such as {"$oid": "zz"}
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for (field, _), value in zip(sort, values):
+        if value is not None and not SORT_FIELD_TYPES[field](value):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def clamp_page_size(limit: int):
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+# Filter for documents strictly after `values` in `sort` order, e.g. for
+# [("created_at", -1), ("_id", -1)]:
+#   created_at < v0  OR  (created_at == v0 AND _id < v1)
+def keyset_filter(sort: list, values: list):
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def sort_values(doc: dict, sort: list):
+    return [doc.get(field) for field, _ in sort]
+
+
+# Stream one page from a cursor fetched with .limit(limit + 1), converting
+# each document as it arrives (convert=None keeps it as is). The cursor is
+# taken from the raw document, so sort keys keep their BSON types.
+# Returns (docs, next_cursor).
+async def keyset_page(cursor, sort: list, limit: int, convert=None, cursor_values=sort_values):
+    docs, last = [], None
+    async for doc in cursor:
+        if len(docs) == limit:
+            return docs, encode_cursor(cursor_values(last, sort))
+        docs.append(convert(doc) if convert else doc)
+        last = doc
+    return docs, None
@@ -0,0 +1,98 @@
+from datetime import datetime
+from bson import ObjectId
+from typing import Callable, NamedTuple, Optional
+
+
+# Conversions for API output; both pass None (a missing field) through
+def object_id_str(value):
+    return str(value) if value is not None else None
+
+
+def isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# Server-side form of each conversion, as an aggregation expression on a
+# field path. Datetimes stay BSON dates; the JSON encoder formats them the
+# same way isoformat() does.
+_PUSHDOWN = {
+    object_id_str: lambda path: {"$toString": path},
+    isoformat: lambda path: path,
+}
+
+
+class Field(NamedTuple):
+    convert: Optional[Callable] = None
+    default: object = None
+    source: Optional[str] = None  # Mongo field name, when it differs from the output key
+
+
+# The output shape of one resource: output key -> Field, a conversion
+# function, or None to copy the value as is. The spec gives both the Mongo
+# `projection` (only these fields are fetched) and a converter compiled
+# once into a single dict literal, so no per-field loop runs per document.
+class Projection:
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = {
+            key: spec if isinstance(spec, Field) else Field(convert=spec)
+            for key, spec in fields.items()
+        }
+        self.mongo = {field.source or key: 1 for key, field in self.fields.items()}
+        if "_id" not in self.mongo:
+            self.mongo["_id"] = 0
+        self.convert = self._compile()
+        self.pushdown = self._pushdown()
+
+    def _compile(self):
+        namespace = {}
+        items = []
+        for i, (key, field) in enumerate(self.fields.items()):
+            value = f"get({field.source or key!r}, _d{i})"
+            namespace[f"_d{i}"] = field.default
+            if field.convert is not None:
+                value = f"_c{i}({value})"
+                namespace[f"_c{i}"] = field.convert
+            items.append(f"{key!r}: {value}")
+        source = f"def convert(doc):\n    get = doc.get\n    return {{{', '.join(items)}}}\n"
+        exec(compile(source, f"<projection {self.name}>", "exec"), namespace)
+        return namespace["convert"]
+
+    # The whole spec as a find() projection of aggregation expressions
+    # (MongoDB 4.4+): the server returns documents already in their API
+    # shape, so they go from the C BSON decoder straight to the JSON encoder.
+    def _pushdown(self):
+        projection = {}
+        for key, field in self.fields.items():
+            expression = "$" + (field.source or key)
+            if field.convert is not None:
+                expression = _PUSHDOWN[field.convert](expression)
+            projection[key] = {"$ifNull": [expression, {"$literal": field.default}]}
+        if "_id" not in projection:
+            projection["_id"] = 0
+        return projection
+
+    # Sort-key values of a pushed-down document for a keyset cursor, with
+    # stringified ObjectIds turned back into ObjectIds
+    def cursor_values(self, doc: dict, sort: list):
+        values = []
+        for source, _ in sort:
+            key = next(k for k, f in self.fields.items() if (f.source or k) == source)
+            value = doc.get(key)
+            if self.fields[key].convert is object_id_str and value is not None:
+                value = ObjectId(value)
+            values.append(value)
+        return values
+
+    # Convert documents as an async cursor yields them
+    async def stream(self, cursor):
+        convert = self.convert
+        async for doc in cursor:
+            yield convert(doc)
+
+    async def to_list(self, cursor):
+        return [doc async for doc in self.stream(cursor)]
+
+    # Same for a sync (pymongo) cursor
+    def iter(self, cursor):
+        return map(self.convert, cursor)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import secrets
+from fastapi import Request
+from fastapi.responses import Response
+from utils.kv import create_backend
+from utils.json_response import dumps
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+
+# Every entry also carries this tag, so clear() is one invalidation
+_ALL = "*"
+# Bumped by every invalidation, see ResponseCache.set
+_EPOCH = "rc:epoch"
+
+
+# Rendered response bodies and their strong ETags, kept in a KV backend
+# (shared between workers with CACHE_URL=redis://...). Every entry carries
+# tags so writes can drop exactly the responses that contain what they
+# changed. Each tag has a random version token in the KV; an entry records
+# the versions of its tags when it is stored and is only served while they
+# all still match. Invalidating a tag deletes its version, so nothing has
+# to track which keys carry it and a lost version (expired, or evicted
+# from memory://) can only cause a miss, never a stale hit. Versions are
+# kept alive by the entries that use them: set() extends their ttl and
+# reads refresh their LRU position.
+#
+# The versions an entry records must be taken before the database read
+# that produced its body (versions()); otherwise a write and invalidation
+# landing during the read would be followed by a new version, and the
+# stale body would be served under it. Tags only known after the read (the
+# questions on a list page) are checked against an epoch every
+# invalidation bumps: if anything was invalidated since versions() the
+# body is not stored.
+class ResponseCache:
+    def __init__(self, backend, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "skipped_sets": 0}
+
+    async def get(self, key):
+        raw = await self.backend.get(f"rc:{key}")
+        if raw is not None:
+            etag, versions, body = raw.split(b"\n", 2)
+            tags, tokens = json.loads(versions)
+            current = await self.backend.mget(*(f"rc:v:{tag}" for tag in tags))
+            if [token and token.decode("ascii") for token in current] == tokens:
+                self.stats["hits"] += 1
+                return body, etag.decode("ascii")
+        self.stats["misses"] += 1
+        return None
+
+    # (version tokens, epoch); the epoch is read after any version was
+    # created, so an invalidation racing the creation shows up in it
+    async def _versions(self, tags):
+        keys = [f"rc:v:{tag}" for tag in tags]
+        *tokens, epoch = await self.backend.mget(*keys, _EPOCH)
+        await self.backend.expire([key for key, token in zip(keys, tokens) if token is not None], self.ttl)
+        created = False
+        for i, token in enumerate(tokens):
+            if token is None:
+                token = secrets.token_hex(8).encode("ascii")
+                created = True
+                # Another worker may have just created it
+                if not await self.backend.set(keys[i], token, self.ttl, nx=True):
+                    token = await self.backend.get(keys[i]) or b"-"
+            tokens[i] = token.decode("ascii")
+        if created:
+            epoch = await self.backend.get(_EPOCH)
+        return tokens, epoch
+
+    # Take before reading what will be cached, and pass to set()
+    async def versions(self, tags=()):
+        tags = [_ALL, *dict.fromkeys(tags)]
+        tokens, epoch = await self._versions(tags)
+        return dict(zip(tags, tokens)), epoch
+
+    async def set(self, key, body: bytes, tags=(), versions=None):
+        etag = make_etag(body)
+        if versions is None:
+            versions = await self.versions()
+        reserved, epoch = versions
+        late = [tag for tag in dict.fromkeys(tags) if tag not in reserved]
+        if late:
+            tokens, current = await self._versions(late)
+            if current != epoch:
+                # Something was invalidated since versions(), maybe one of these
+                self.stats["skipped_sets"] += 1
+                return etag
+            reserved = {**reserved, **dict(zip(late, tokens))}
+        versions = dumps([list(reserved), list(reserved.values())])
+        await self.backend.set(f"rc:{key}", etag.encode("ascii") + b"\n" + versions + b"\n" + body, self.ttl)
+        return etag
+
+    async def invalidate(self, *tags):
+        # Epoch first: a set() that still finds the old epoch afterwards
+        # took its versions before they are deleted here
+        await self.backend.incr(_EPOCH)
+        await self.backend.delete(*(f"rc:v:{tag}" for tag in tags))
+        self.stats["invalidations"] += len(tags)
+
+    async def clear(self):
+        await self.invalidate(_ALL)
+
+    def snapshot(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self.backend.snapshot(),
+        }
+
+
+def make_etag(body: bytes):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+# 200 with the body, or 304 when the client already holds this version
+def conditional_response(request: Request, body: bytes, etag: str, cache_control: str):
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# Serve `key` from the cache (304 if the client's copy is current), or None on a miss
+async def cached_response(request: Request, key: str, cache_control: str = "public, no-cache"):
+    entry = await response_cache.get(key)
+    if entry is None:
+        return None
+    body, etag = entry
+    return conditional_response(request, body, etag, cache_control)
+
+
+# Render `content`, cache it under `key` and answer conditionally.
+# `versions` is response_cache.versions(), taken before `content` was read.
+async def cache_response(request: Request, key: str, content, tags, versions,
+                         cache_control: str = "public, no-cache"):
+    body = dumps(content)
+    etag = await response_cache.set(key, body, tags, versions)
+    return conditional_response(request, body, etag, cache_control)
+
+
+response_cache = ResponseCache(create_backend(max_entries=RESPONSE_CACHE_MAX_ENTRIES))
+
+# Tags for the question read endpoints
+QUESTION_LISTS = "questions:list"
+
+
+def question_tag(question_id):
+    return f"question:{question_id}"
+
+
+def question_list_tag(sort: str):
+    return f"{QUESTION_LISTS}:{sort}"
+
+
+# A question changed: drop its detail, every list page showing it, and
+# every page of the given sort orders (its position there moved)
+async def invalidate_question(question_id, *sorts):
+    await response_cache.invalidate(question_tag(question_id), *(question_list_tag(sort) for sort in sorts))
+
+
+# A question was added: any list page may now be different
+async def invalidate_question_lists():
+    await response_cache.invalidate(QUESTION_LISTS)
+
+
+def notifications_tag(user_id):
+    return f"notifications:{user_id}"
+
+
+async def invalidate_notifications(user_id):
+    await response_cache.invalidate(notifications_tag(user_id))
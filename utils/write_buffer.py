@@ -0,0 +1,176 @@
+import asyncio
+import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+# Coalesces $inc deltas per document _id in memory and writes them with a
+# single unordered bulk_write every `interval` seconds, or sooner once
+# `max_events` deltas are queued. At most `max_keys` distinct documents
+# are held; callers adding a new key past that wait for the next flush.
+# `on_flush` is awaited with {key: deltas} once those deltas are written.
+# A document whose update the server rejects (writeErrors) is retried on
+# the next `max_retries` flushes, then its deltas are dropped.
+class WriteBehindBuffer:
+    def __init__(self, get_collection, interval: float = 0.25, max_events: int = 500, max_keys: int = 10000,
+                 on_flush=None, max_retries: int = 3):
+        self.get_collection = get_collection
+        self.on_flush = on_flush
+        self.interval = interval
+        self.max_events = max_events
+        self.max_keys = max_keys
+        self.max_retries = max_retries
+        self._pending = {}
+        self._failures = {}
+        self._events = 0
+        self._task = None
+        self._stopping = False
+        self._wake = None
+        self._flushed = None
+        self._flush_lock = None
+        self.stats = {
+            "events": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "dropped_ops": 0,
+            "backpressure_waits": 0,
+            "last_flush_size": 0,
+            "max_flush_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._flushed = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Let the loop finish its current flush, then drain what is left
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        await self.flush()
+
+    def _merge(self, key, inc: dict):
+        fields = self._pending.setdefault(key, {})
+        for field, value in inc.items():
+            fields[field] = fields.get(field, 0) + value
+
+    async def add(self, key, inc: dict):
+        if self._task is None:
+            # Not started (scripts, shutdown): write through
+            await self.get_collection().update_one({"_id": key}, {"$inc": inc})
+            if self.on_flush:
+                await self.on_flush({key: inc})
+            return
+
+        while key not in self._pending and len(self._pending) >= self.max_keys:
+            self.stats["backpressure_waits"] += 1
+            self._wake.set()
+            self._flushed.clear()
+            await self._flushed.wait()
+
+        self._merge(key, inc)
+        self._events += 1
+        self.stats["events"] += 1
+        if self._events >= self.max_events:
+            self._wake.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep flushing; a dead loop would leave add() waiting forever
+                print(f"Write-behind flush loop error: {e}")
+
+    # on_flush failing must not undo or block the writes that already landed
+    async def _notify(self, applied):
+        if not self.on_flush or not applied:
+            return
+        try:
+            await self.on_flush(applied)
+        except Exception as e:
+            print(f"Write-behind on_flush failed for {len(applied)} documents: {e}")
+            self.stats["flush_errors"] += 1
+
+    async def flush(self):
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            try:
+                await self._flush()
+            finally:
+                self._flushed.set()
+
+    async def _flush(self):
+        pending, self._pending, self._events = self._pending, {}, 0
+        if pending:
+            keys = [key for key, inc in pending.items() if any(inc.values())]
+            ops = [UpdateOne({"_id": key}, {"$inc": {f: v for f, v in pending[key].items() if v}}) for key in keys]
+            started = time.perf_counter()
+            try:
+                if ops:
+                    await self.get_collection().bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: every op not listed in writeErrors was applied,
+                # so only the failed ones go back (re-adding the rest would
+                # count those deltas twice). A document that keeps failing
+                # (e.g. $inc on a non-numeric field) is given up on.
+                failed = {keys[error["index"]] for error in e.details.get("writeErrors", [])}
+                print(f"Write-behind flush failed for {len(failed)} of {len(ops)} documents: {e}")
+                self.stats["flush_errors"] += 1
+                for key in failed:
+                    self._failures[key] = self._failures.get(key, 0) + 1
+                    if self._failures[key] > self.max_retries:
+                        print(f"Write-behind dropping {pending[key]} for {key} after {self.max_retries} retries")
+                        self.stats["dropped_ops"] += 1
+                        del self._failures[key]
+                    else:
+                        self._merge(key, pending[key])
+                for key in keys:
+                    if key not in failed:
+                        self._failures.pop(key, None)
+                await self._notify({key: inc for key, inc in pending.items() if key not in failed})
+            except Exception as e:
+                # The batch as a whole failed (network, timeout): retry all of it
+                print(f"Write-behind flush failed, requeueing {len(pending)} documents: {e}")
+                self.stats["flush_errors"] += 1
+                for key, inc in pending.items():
+                    self._merge(key, inc)
+            else:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stats["flushes"] += 1
+                self.stats["last_flush_size"] = len(ops)
+                self.stats["max_flush_size"] = max(self.stats["max_flush_size"], len(ops))
+                self.stats["last_flush_ms"] = round(elapsed, 3)
+                self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], round(elapsed, 3))
+                self.stats["total_flush_ms"] += elapsed
+                for key in keys:
+                    self._failures.pop(key, None)
+                await self._notify(pending)
+
+    def snapshot(self):
+        flushes = self.stats["flushes"]
+        return {
+            **self.stats,
+            "pending_keys": len(self._pending),
+            "avg_flush_ms": round(self.stats["total_flush_ms"] / flushes, 3) if flushes else 0.0,
+        }